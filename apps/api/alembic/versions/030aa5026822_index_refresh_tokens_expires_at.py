@@ -0,0 +1,31 @@
+"""index refresh_tokens expires_at
+
+Revision ID: 030aa5026822
+Revises: 6dedbddda5f7
+Create Date: 2026-10-19 10:12:41.208511
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "030aa5026822"
+down_revision: Union[str, Sequence[str], None] = "6dedbddda5f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so logins and refreshes keep inserting while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens", postgresql_concurrently=True)
@@ -0,0 +1,97 @@
+"""inventory stripes and reservations
+
+Revision ID: 4c9d0e7a2b18
+Revises: b7e2c4d91f35
+Create Date: 2026-10-19 12:41:52.870214
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c9d0e7a2b18"
+down_revision: Union[str, Sequence[str], None] = "b7e2c4d91f35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing stock becomes stripe 0; reserved stays non-negative per stripe throughout.
+    op.add_column("inventory", sa.Column("stripe", sa.SmallInteger(), server_default=sa.text("0"), nullable=False))
+    op.drop_constraint("inventory_pkey", "inventory", type_="primary")
+    op.create_primary_key("inventory_pkey", "inventory", ["sku", "stripe"])
+    op.execute(
+        """
+        CREATE VIEW inventory_totals AS
+        SELECT sku, SUM(available)::int AS available, SUM(reserved)::int AS reserved, COUNT(*)::int AS stripes
+        FROM inventory
+        GROUP BY sku
+        """
+    )
+    op.create_table(
+        "inventory_reservations",
+        sa.Column("order_id", sa.Uuid(), nullable=False),
+        sa.Column("sku", sa.String(), nullable=False),
+        sa.Column("stripe", sa.SmallInteger(), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("order_id", "sku"),
+    )
+    # Open orders that reserved before this table existed. Orders older than inventory itself never reserved,
+    # so each SKU's reserved units are handed out newest order first and older orders get nothing.
+    op.execute(
+        """
+        INSERT INTO inventory_reservations (order_id, sku, stripe, qty)
+        SELECT order_id, sku, 0, qty
+        FROM (
+            SELECT q.order_id, q.sku, q.qty, i.reserved,
+                   SUM(q.qty) OVER (PARTITION BY q.sku ORDER BY q.created_at DESC, q.order_id) AS running
+            FROM (
+                SELECT oi.order_id, oi.sku, SUM(oi.qty)::int AS qty, o.created_at
+                FROM order_items oi
+                JOIN orders o ON o.id = oi.order_id
+                WHERE o.status = 'created'
+                GROUP BY oi.order_id, oi.sku, o.created_at
+            ) q
+            JOIN inventory i ON i.sku = q.sku
+        ) held
+        WHERE running <= reserved
+        """
+    )
+    # Reserved units no open order is recorded as holding become available again, so reserved always equals
+    # what inventory_reservations says is held.
+    op.execute(
+        """
+        UPDATE inventory i
+        SET available = i.available + i.reserved - h.held, reserved = h.held
+        FROM (
+            SELECT inv.sku, COALESCE(SUM(r.qty), 0)::int AS held
+            FROM inventory inv
+            LEFT JOIN inventory_reservations r ON r.sku = inv.sku
+            GROUP BY inv.sku
+        ) h
+        WHERE i.sku = h.sku AND i.reserved <> h.held
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("inventory_reservations")
+    op.execute("DROP VIEW inventory_totals")
+    op.execute(
+        """
+        INSERT INTO inventory (sku, stripe, available, reserved)
+        SELECT sku, 0, SUM(available), SUM(reserved) FROM inventory GROUP BY sku
+        ON CONFLICT (sku, stripe) DO UPDATE SET available = excluded.available, reserved = excluded.reserved
+        """
+    )
+    op.execute("DELETE FROM inventory WHERE stripe <> 0")
+    op.drop_constraint("inventory_pkey", "inventory", type_="primary")
+    op.create_primary_key("inventory_pkey", "inventory", ["sku"])
+    op.drop_column("inventory", "stripe")
@@ -0,0 +1,38 @@
+"""add inventory
+
+Revision ID: b7e2c4d91f35
+Revises: 030aa5026822
+Create Date: 2026-10-19 12:04:17.533102
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2c4d91f35"
+down_revision: Union[str, Sequence[str], None] = "030aa5026822"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "inventory",
+        sa.Column("sku", sa.String(), nullable=False),
+        sa.Column("available", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("reserved", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.CheckConstraint("available >= 0", name="ck_inventory_available_non_negative"),
+        sa.CheckConstraint("reserved >= 0", name="ck_inventory_reserved_non_negative"),
+        sa.PrimaryKeyConstraint("sku"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("inventory")
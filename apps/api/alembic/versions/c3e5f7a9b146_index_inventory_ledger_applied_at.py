@@ -0,0 +1,39 @@
+"""index inventory ledger applied_at
+
+Revision ID: c3e5f7a9b146
+Revises: e1f3a5c7d902
+Create Date: 2026-10-19 16:02:48.339021
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e5f7a9b146"
+down_revision: Union[str, Sequence[str], None] = "e1f3a5c7d902"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so orders and the reconciler keep writing the ledger while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_inventory_ledger_applied_at_id",
+            "inventory_ledger",
+            ["applied_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("applied_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_inventory_ledger_applied_at_id", table_name="inventory_ledger", postgresql_concurrently=True)
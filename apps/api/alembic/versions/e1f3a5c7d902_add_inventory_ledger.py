@@ -0,0 +1,47 @@
+"""add inventory ledger
+
+Revision ID: e1f3a5c7d902
+Revises: 4c9d0e7a2b18
+Create Date: 2026-10-19 13:22:06.114387
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1f3a5c7d902"
+down_revision: Union[str, Sequence[str], None] = "4c9d0e7a2b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "inventory_ledger",
+        sa.Column("id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False),
+        sa.Column("order_id", sa.Uuid(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("sku", sa.String(), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("applied_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("kind IN ('reserve', 'release', 'consume')", name="ck_inventory_ledger_kind_valid"),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_inventory_ledger_order_id_kind", "inventory_ledger", ["order_id", "kind"], unique=False)
+    op.create_index(
+        "ix_inventory_ledger_unapplied_sku", "inventory_ledger", ["sku"], unique=False, postgresql_where=sa.text("applied_at IS NULL")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_inventory_ledger_unapplied_sku", table_name="inventory_ledger", postgresql_where=sa.text("applied_at IS NULL"))
+    op.drop_index("ix_inventory_ledger_order_id_kind", table_name="inventory_ledger")
+    op.drop_table("inventory_ledger")
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, HTTPException, Response, Request, Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.auth import RegisterRequest, LoginRequest, TokenResponse, UserResponse
 from app.services import auth_service
 from app.db.deps import get_db
+from app.api.deps import rate_limit
 from app.cache.redis_client import redis
-from app.cache.rate_limit import check_login_rate
+from app.cache.token_denylist import deny_token
+from app.core.config import settings
+from app.security.jwt import decode_token_cached, token_cache
+from app.security.passwords import PasswordHasherBusy
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], dependencies=[Depends(rate_limit("auth"))])
 
 
 @router.post("/register", response_model=UserResponse, status_code=201)
@@ -15,19 +20,18 @@ async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
     try:
         user = await auth_service.register_user(db, data.email, data.password)
         return user
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Service busy, retry later", headers={"Retry-After": "1"})
     except ValueError:
         raise HTTPException(status_code=409, detail="Email already exists")
 
 
-@router.post("/login", response_model=TokenResponse)
-async def login(data: LoginRequest, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
-    try:
-        client_ip = request.client.host if request.client else "unknown"
-        await check_login_rate(redis, client_ip)
-    except ValueError:
-        raise HTTPException(status_code=429, detail="Too many requests")
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(rate_limit("login"))])
+async def login(data: LoginRequest, response: Response, db: AsyncSession = Depends(get_db)):
     try:
         tokens = await auth_service.login_user(db, data.email, data.password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Service busy, retry later", headers={"Retry-After": "1"})
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -51,10 +55,24 @@ async def refresh(request: Request, response: Response, db: AsyncSession = Depen
 
 
 @router.post("/logout", status_code=204)
-async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+async def logout(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials | None = Depends(HTTPBearer(auto_error=False)),
+):
     refresh_token = request.cookies.get("refresh_token")
     if refresh_token:
         await auth_service.logout(db, refresh_token)
 
+    if credentials and settings.jwt_denylist_enabled:
+        try:
+            claims = decode_token_cached(credentials.credentials)
+        except Exception:
+            claims = None
+        if claims and claims.get("jti"):
+            await deny_token(redis, claims["jti"], claims["exp"])
+            token_cache.discard(credentials.credentials)
+
     response.delete_cookie(key="refresh_token")
     return None
@@ -1,18 +1,42 @@
-from fastapi import Depends, HTTPException
+import logging
+
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from redis.exceptions import RedisError
+
+from app.cache.redis_client import redis
+from app.cache.rate_limit import hit_rate_limit, parse_rate_limit
+from app.cache.token_denylist import is_token_denied
+from app.core.config import settings
+from app.security.jwt import decode_token_cached
 
-from app.security.jwt import decode_token
+logger = logging.getLogger(__name__)
 
 bearer = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> dict:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer)) -> dict:
     try:
-        payload = decode_token(credentials.credentials)
-        return payload
+        payload = decode_token_cached(credentials.credentials)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+    if settings.jwt_denylist_enabled and payload.get("jti") and await _is_denied(payload["jti"]):
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return payload
+
+
+async def _is_denied(jti: str) -> bool:
+    """Redis down: jwt_denylist_fail_open accepts the token unchecked, otherwise the request gets 503."""
+    try:
+        return await is_token_denied(redis, jti)
+    except (RedisError, OSError):
+        if settings.jwt_denylist_fail_open:
+            logger.warning("token denylist unavailable, accepting token unchecked", exc_info=True)
+            return False
+        logger.error("token denylist unavailable, rejecting request", exc_info=True)
+        raise HTTPException(status_code=503, detail="Service unavailable, retry later", headers={"Retry-After": "1"})
+
 
 def require_role(role: str):
     def checker(user: dict = Depends(get_current_user)):
@@ -21,3 +45,36 @@ def require_role(role: str):
         return user
 
     return checker
+
+
+def rate_limit(name: str, per: str = "ip"):
+    """
+    Route dependency enforcing the `settings.rate_limits[name]` token bucket, keyed by client IP or by user.
+    Limiters without a configured limit are no-ops.
+    """
+    spec = settings.rate_limits.get(name)
+    if not spec:
+
+        async def unlimited() -> None:
+            return None
+
+        return unlimited
+
+    limit, period_seconds = parse_rate_limit(spec)
+
+    async def enforce(subject: str) -> None:
+        retry_after = await hit_rate_limit(redis, name, subject, limit, period_seconds)
+        if retry_after is not None:
+            raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": str(retry_after)})
+
+    if per == "user":
+
+        async def user_limiter(user: dict = Depends(get_current_user)) -> None:
+            await enforce(user["sub"])
+
+        return user_limiter
+
+    async def ip_limiter(request: Request) -> None:
+        await enforce(request.client.host if request.client else "unknown")
+
+    return ip_limiter
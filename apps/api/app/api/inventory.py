@@ -0,0 +1,61 @@
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import rate_limit, require_role
+from app.cache.redis_client import redis
+from app.core.config import settings
+from app.db.deps import get_db
+from app.schemas.inventory import AvailabilityResponse, InventoryResponse, RestockRequest, SkuAvailability, StripesRequest
+from app.services import inventory_service
+
+router = APIRouter(prefix="/inventory", tags=["inventory"])
+
+SkuPath = Path(min_length=3, max_length=64, pattern=r"^[A-Z0-9_-]+$")
+SKU_PATTERN = re.compile(r"^[A-Z0-9_-]{3,64}$")
+MAX_AVAILABILITY_SKUS = 100
+
+
+def _inventory_response(row) -> InventoryResponse:
+    return InventoryResponse(sku=row.sku, available=row.available, reserved=row.reserved, stripes=row.stripes)
+
+
+@router.get("/availability", response_model=AvailabilityResponse, dependencies=[Depends(rate_limit("availability"))])
+async def availability(
+    skus: str = Query(..., description="Comma-separated SKUs"),
+    db: AsyncSession = Depends(get_db),
+) -> AvailabilityResponse:
+    requested = list(dict.fromkeys(sku.strip() for sku in skus.split(",") if sku.strip()))
+    if not requested or len(requested) > MAX_AVAILABILITY_SKUS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_AVAILABILITY_SKUS} SKUs")
+    if not all(SKU_PATTERN.match(sku) for sku in requested):
+        raise HTTPException(status_code=400, detail="Invalid SKU")
+
+    levels = await inventory_service.get_availability(db, redis, requested)
+    return AvailabilityResponse(items=[SkuAvailability(sku=sku, available=levels[sku], in_stock=levels[sku] > 0) for sku in requested])
+
+
+@router.post("/{sku}/restock", response_model=InventoryResponse)
+async def restock(
+    data: RestockRequest,
+    sku: str = SkuPath,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_role("admin")),
+) -> InventoryResponse:
+    return _inventory_response(await inventory_service.restock(db, redis, sku, data.qty))
+
+
+@router.put("/{sku}/stripes", response_model=InventoryResponse)
+async def set_stripes(
+    data: StripesRequest,
+    sku: str = SkuPath,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_role("admin")),
+) -> InventoryResponse:
+    if data.stripes > settings.inventory_max_stripes:
+        raise HTTPException(status_code=400, detail=f"At most {settings.inventory_max_stripes} stripes")
+    row = await inventory_service.set_stripes(db, sku, data.stripes)
+    if row is None:
+        raise HTTPException(status_code=404, detail="SKU not found")
+    return _inventory_response(row)
@@ -5,14 +5,15 @@ from app.db.deps import get_db
 from app.schemas.orders import CreateOrderRequest, OrderItemResponse, OrderListResponse, OrderResponse, OrderSummaryResponse
 from app.schemas.order_status import UpdateOrderStatusRequest
 from app.services import orders_service
-from app.api.deps import get_current_user, require_role
+from app.services.inventory_service import InsufficientStock
+from app.api.deps import get_current_user, rate_limit, require_role
 from app.cache.redis_client import redis
 from app.cache.order_cache import get_cached_order, set_cached_order, invalidate_order
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-@router.post("", response_model=OrderResponse, status_code=201)
+@router.post("", response_model=OrderResponse, status_code=201, dependencies=[Depends(rate_limit("orders_create", per="user"))])
 async def create_order(
     data: CreateOrderRequest,
     idempotency_key: str = Header(..., alias="Idempotency-Key"),
@@ -21,9 +22,11 @@ async def create_order(
 ) -> OrderResponse:
     try:
         order = await orders_service.create_order_with_outbox(
-            db=db, user_id=user["sub"], idempotency_key=idempotency_key, currency=data.currency, items=data.items
+            db=db, redis=redis, user_id=user["sub"], idempotency_key=idempotency_key, currency=data.currency, items=data.items
         )
 
+    except InsufficientStock as exc:
+        raise HTTPException(status_code=409, detail=f"Insufficient stock: {', '.join(exc.skus)}")
     except ValueError:
         raise HTTPException(status_code=409, detail="Idempotency conflict")
 
@@ -108,6 +111,7 @@ async def update_status(
     try:
         order = await orders_service.update_order_status(
             db=db,
+            redis=redis,
             user_id=user["sub"],
             order_id=order_id,
             new_status=data.status,
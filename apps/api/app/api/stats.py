@@ -1,30 +1,83 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.api.deps import get_current_user
+from app.cache.redis_client import redis
+from app.cache.stats_cache import get_cached_stats, set_cached_stats, stats_cache_key, ttl_until_next_window
+from app.core.config import settings
 from app.db.mongo import get_mongo_client
-from app.schemas.stats import SkuStat, SkuStatsResponse
+from app.repositories import stats_repository
+from app.schemas.stats import SkuStat, SkuStatsResponse, SkuTotal, TopSkusResponse
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
+Resolution = Literal["minute", "hour", "day"]
+SKU_STATS_COLLECTIONS: dict[str, str] = {"minute": "sku_stats", "hour": "sku_stats_hourly", "day": "sku_stats_daily"}
+
+
+def _sku_stats_collection(resolution: Resolution):
+    return get_mongo_client()["app"][SKU_STATS_COLLECTIONS[resolution]]
+
+
+def parse_cursor(cursor: str) -> tuple[str, str]:
+    window_start, sku = cursor.split("|", 1)
+    return window_start, sku
+
+
+def make_cursor(window_start: str, sku: str) -> str:
+    return f"{window_start}|{sku}"
+
+
+def _cache_ttl() -> int:
+    return ttl_until_next_window(settings.stats_window_seconds, settings.stats_cache_max_ttl_seconds)
+
 
 @router.get("/sku", response_model=SkuStatsResponse)
 async def sku_stats(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
     from_ts: str | None = None,
     to_ts: str | None = None,
+    sku: list[str] | None = Query(None),
+    cursor: str | None = None,
+    resolution: Resolution = "minute",
     _: dict = Depends(get_current_user),
 ) -> SkuStatsResponse:
-    client = get_mongo_client()
-    collection = client["app"]["sku_stats"]
-    query: dict = {}
-    if from_ts or to_ts:
-        window_filter: dict = {}
-        if from_ts:
-            window_filter["$gte"] = from_ts
-        if to_ts:
-            window_filter["$lte"] = to_ts
-        query["window_start"] = window_filter
-
-    cursor = collection.find(query, {"_id": 0}).sort("window_start", -1).limit(limit)
-    items = [SkuStat(**doc) for doc in cursor]
-    return SkuStatsResponse(items=items)
+    try:
+        parsed = parse_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    params = {"limit": limit, "from_ts": from_ts, "to_ts": to_ts, "sku": sorted(sku) if sku else None, "cursor": cursor, "resolution": resolution}
+    key = stats_cache_key("sku", params)
+    cached = await get_cached_stats(redis, key)
+    if cached:
+        return SkuStatsResponse(**cached)
+
+    docs = await stats_repository.list_sku_stats(_sku_stats_collection(resolution), limit, skus=sku, from_ts=from_ts, to_ts=to_ts, cursor=parsed)
+    next_cursor = make_cursor(docs[-1]["window_start"], docs[-1]["sku"]) if len(docs) == limit else None
+    response = SkuStatsResponse(items=[SkuStat(**doc) for doc in docs], next_cursor=next_cursor)
+
+    await set_cached_stats(redis, key, response.model_dump(), ttl_seconds=_cache_ttl())
+    return response
+
+
+@router.get("/sku/top", response_model=TopSkusResponse)
+async def top_skus(
+    limit: int = Query(10, ge=1, le=100),
+    from_ts: str | None = None,
+    to_ts: str | None = None,
+    resolution: Resolution = "minute",
+    _: dict = Depends(get_current_user),
+) -> TopSkusResponse:
+    # Long ranges should use hour/day rollups: the $group then reads a handful of documents per SKU.
+    key = stats_cache_key("sku-top", {"limit": limit, "from_ts": from_ts, "to_ts": to_ts, "resolution": resolution})
+    cached = await get_cached_stats(redis, key)
+    if cached:
+        return TopSkusResponse(**cached)
+
+    docs = await stats_repository.top_skus_by_qty(_sku_stats_collection(resolution), limit, from_ts=from_ts, to_ts=to_ts)
+    response = TopSkusResponse(items=[SkuTotal(**doc) for doc in docs])
+
+    await set_cached_stats(redis, key, response.model_dump(), ttl_seconds=_cache_ttl())
+    return response
@@ -0,0 +1,140 @@
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+
+# Set once every SKU hash has been rebuilt from Postgres. A Redis restart without persistence loses it,
+# which sends reservations back to Postgres until the next rebuild.
+INVENTORY_LOADED_KEY = "inv:loaded"
+INVENTORY_REBUILD_LOCK_KEY = "inv:rebuild-lock"
+
+# KEYS: one hash per SKU, then the loaded marker; ARGV: qty per SKU.
+# Returns {-1} when not loaded, the 1-based positions of SKUs without enough stock, or {} after reserving all of them.
+_RESERVE_LUA = """
+if redis.call('EXISTS', KEYS[#KEYS]) == 0 then
+    return {-1}
+end
+local short = {}
+for i = 1, #KEYS - 1 do
+    local available = tonumber(redis.call('HGET', KEYS[i], 'available'))
+    if available == nil or available < tonumber(ARGV[i]) then
+        short[#short + 1] = i
+    end
+end
+if #short > 0 then
+    return short
+end
+for i = 1, #KEYS - 1 do
+    redis.call('HINCRBY', KEYS[i], 'available', -tonumber(ARGV[i]))
+    redis.call('HINCRBY', KEYS[i], 'reserved', tonumber(ARGV[i]))
+end
+return {}
+"""
+
+# KEYS: one hash per SKU, then the loaded marker; ARGV: available delta and reserved delta per SKU.
+# A no-op before the first rebuild, which will read the change from Postgres anyway.
+_ADJUST_LUA = """
+if redis.call('EXISTS', KEYS[#KEYS]) == 0 then
+    return 0
+end
+for i = 1, #KEYS - 1 do
+    redis.call('HINCRBY', KEYS[i], 'available', tonumber(ARGV[2 * i - 1]))
+    redis.call('HINCRBY', KEYS[i], 'reserved', tonumber(ARGV[2 * i]))
+end
+return 1
+"""
+
+# KEYS: one hash per SKU; ARGV: TTL seconds, then available and reserved per SKU.
+# Writes only hashes that do not exist, so a read-through never overwrites a newer value written meanwhile.
+_ADD_LUA = """
+local added = 0
+for i = 1, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 0 then
+        redis.call('HSET', KEYS[i], 'available', ARGV[2 * i], 'reserved', ARGV[2 * i + 1])
+        redis.call('EXPIRE', KEYS[i], ARGV[1])
+        added = added + 1
+    end
+end
+return added
+"""
+
+
+# Script objects by source, created on first use; the SHA is computed once per process, not per call.
+_scripts: dict[str, AsyncScript] = {}
+
+
+def _script(redis: Redis, source: str) -> AsyncScript:
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = redis.register_script(source)
+    return script
+
+
+def inventory_key(sku: str) -> str:
+    return f"inv:{sku}"
+
+
+async def reserve_inventory(redis: Redis, quantities: dict[str, int]) -> list[str] | None:
+    """
+    Checks and reserves every SKU in one script call: all or nothing. Returns the SKUs without enough stock
+    (empty when reserved), or None when the cache is not loaded and the caller has to go to Postgres.
+    """
+    skus = sorted(quantities)
+    reserve = _script(redis, _RESERVE_LUA)
+    result = await reserve(keys=[*map(inventory_key, skus), INVENTORY_LOADED_KEY], args=[quantities[sku] for sku in skus], client=redis)
+    if result and int(result[0]) == -1:
+        return None
+    return [skus[int(i) - 1] for i in result]
+
+
+async def adjust_inventory(redis: Redis, deltas: dict[str, tuple[int, int]]) -> bool:
+    """Applies (available, reserved) deltas per SKU; returns False when the cache is not loaded."""
+    if not deltas:
+        return True
+    skus = sorted(deltas)
+    adjust = _script(redis, _ADJUST_LUA)
+    args = [delta for sku in skus for delta in deltas[sku]]
+    return bool(int(await adjust(keys=[*map(inventory_key, skus), INVENTORY_LOADED_KEY], args=args, client=redis)))
+
+
+async def get_inventory_levels(redis: Redis, skus: list[str]) -> dict[str, tuple[int, int] | None]:
+    """(available, reserved) per SKU in one pipeline round trip; None for SKUs without a hash."""
+    async with redis.pipeline(transaction=False) as pipe:
+        for sku in skus:
+            pipe.hmget(inventory_key(sku), "available", "reserved")
+        results = await pipe.execute()
+    return {sku: (int(available), int(reserved)) if available is not None else None for sku, (available, reserved) in zip(skus, results)}
+
+
+async def set_inventory_levels(redis: Redis, levels: dict[str, tuple[int, int]], ttl_seconds: int | None = None) -> None:
+    """Overwrites the hashes; without ttl_seconds they do not expire (the fast path owns them in redis mode)."""
+    async with redis.pipeline(transaction=False) as pipe:
+        for sku, (available, reserved) in levels.items():
+            pipe.hset(inventory_key(sku), mapping={"available": available, "reserved": reserved})
+            if ttl_seconds:
+                pipe.expire(inventory_key(sku), ttl_seconds)
+        await pipe.execute()
+
+
+async def add_inventory_levels(redis: Redis, levels: dict[str, tuple[int, int]], ttl_seconds: int) -> int:
+    """Caches levels only for SKUs without a hash yet, in one script call; returns how many were written."""
+    if not levels:
+        return 0
+    skus = sorted(levels)
+    add = _script(redis, _ADD_LUA)
+    args = [ttl_seconds, *(level for sku in skus for level in levels[sku])]
+    return int(await add(keys=[inventory_key(sku) for sku in skus], args=args, client=redis))
+
+
+async def is_inventory_loaded(redis: Redis) -> bool:
+    return bool(await redis.exists(INVENTORY_LOADED_KEY))
+
+
+async def mark_inventory_loaded(redis: Redis) -> None:
+    await redis.set(INVENTORY_LOADED_KEY, "1")
+
+
+async def acquire_rebuild_lock(redis: Redis, ttl_seconds: int) -> bool:
+    return bool(await redis.set(INVENTORY_REBUILD_LOCK_KEY, "1", nx=True, ex=ttl_seconds))
+
+
+async def release_rebuild_lock(redis: Redis) -> None:
+    await redis.delete(INVENTORY_REBUILD_LOCK_KEY)
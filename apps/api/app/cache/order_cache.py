@@ -1,6 +1,8 @@
 import json
 from redis.asyncio import Redis
 
+from app.core.metrics import order_cache_lookups_total
+
 
 def order_cache_key(order_id: str) -> str:
     return f"order:{order_id}"
@@ -8,6 +10,7 @@ def order_cache_key(order_id: str) -> str:
 
 async def get_cached_order(redis: Redis, order_id: str) -> dict | None:
     raw = await redis.get(order_cache_key(order_id))
+    order_cache_lookups_total.labels(result="hit" if raw else "miss").inc()
     return json.loads(raw) if raw else None
 
 
@@ -1,18 +1,73 @@
-from datetime import datetime, timezone
+import logging
+import math
+
 from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Token bucket: refill, take one token and refresh the TTL in a single round trip.
+# Returns {allowed, retry_after_ms}. Uses the server clock so API replicas agree on time.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_per_ms)
+
+local allowed = 0
+local retry_after_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after_ms = math.ceil((1 - tokens) / refill_per_ms)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_per_ms) + 1000)
+return {allowed, retry_after_ms}
+"""
+
+
+_token_bucket: AsyncScript | None = None
+
+
+def _token_bucket_script(redis: Redis) -> AsyncScript:
+    # Created once; each call still runs EVALSHA and falls back to EVAL once per server.
+    global _token_bucket
+    if _token_bucket is None:
+        _token_bucket = redis.register_script(_TOKEN_BUCKET_LUA)
+    return _token_bucket
+
 
+def rate_limit_key(name: str, subject: str) -> str:
+    return f"rl:{name}:{subject}"
 
-def login_rate_key(ip: str, minute: str) -> str:
-    return f"rl:login:{ip}:{minute}"
 
+def parse_rate_limit(spec: str) -> tuple[int, float]:
+    limit, period = spec.split("/", 1)
+    return int(limit), float(period)
 
-async def check_login_rate(redis: Redis, ip: str, limit: int = 10) -> None:
-    minute = datetime.now(timezone.utc).strftime("%Y%m%d%H%M")
-    key = login_rate_key(ip, minute)
 
-    count = await redis.incr(key)
-    if count == 1:
-        await redis.expire(key, 60)
+async def hit_rate_limit(redis: Redis, name: str, subject: str, limit: int, period_seconds: float) -> int | None:
+    """
+    Takes one token from the bucket; returns None when allowed, otherwise the Retry-After seconds.
+    Fails open when Redis is unavailable: rate limiting must never take the API down.
+    """
+    try:
+        allowed, retry_after_ms = await _token_bucket_script(redis)(
+            keys=[rate_limit_key(name, subject)], args=[limit, limit / (period_seconds * 1000)], client=redis
+        )
+    except (RedisError, OSError):
+        logger.warning("rate limiter unavailable, allowing request (limiter=%s)", name, exc_info=True)
+        return None
 
-    if count > limit:
-        raise ValueError("Too many requests")
+    if int(allowed):
+        return None
+    return max(1, math.ceil(int(retry_after_ms) / 1000))
@@ -0,0 +1,37 @@
+import hashlib
+import json
+import logging
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+def stats_cache_key(kind: str, params: dict) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"stats:{kind}:{digest}"
+
+
+def ttl_until_next_window(window_seconds: int, max_ttl_seconds: int) -> int:
+    # New rows only land when a window closes, so a cached answer stays valid until the next boundary.
+    remaining = window_seconds - int(time.time()) % window_seconds
+    return max(1, min(remaining, max_ttl_seconds))
+
+
+async def get_cached_stats(redis: Redis, key: str) -> dict | None:
+    """None on a miss and when Redis is unavailable: the stats endpoints then read MongoDB directly."""
+    try:
+        raw = await redis.get(key)
+    except (RedisError, OSError):
+        logger.warning("stats cache unavailable, reading from mongo", exc_info=True)
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def set_cached_stats(redis: Redis, key: str, payload: dict, ttl_seconds: int) -> None:
+    try:
+        await redis.set(key, json.dumps(payload), ex=ttl_seconds)
+    except (RedisError, OSError):
+        logger.warning("could not cache stats response", exc_info=True)
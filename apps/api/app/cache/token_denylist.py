@@ -0,0 +1,16 @@
+import time
+from redis.asyncio import Redis
+
+
+def token_denylist_key(jti: str) -> str:
+    return f"jwt:deny:{jti}"
+
+
+async def deny_token(redis: Redis, jti: str, exp: int) -> None:
+    ttl_seconds = int(exp - time.time())
+    if ttl_seconds > 0:
+        await redis.set(token_denylist_key(jti), "1", ex=ttl_seconds)
+
+
+async def is_token_denied(redis: Redis, jti: str) -> bool:
+    return bool(await redis.exists(token_denylist_key(jti)))
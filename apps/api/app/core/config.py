@@ -9,10 +9,45 @@ class Settings(BaseSettings):
     jwt_secret: str
     access_ttl_seconds: int = 900
     refresh_ttl_seconds: int = 1209600
+    refresh_token_purge_batch_size: int = 500
+    refresh_token_revoked_retention_seconds: int = 86400
+    jwt_cache_max_entries: int = 10000
+    jwt_denylist_enabled: bool = False
+    jwt_denylist_fail_open: bool = False  # when Redis is down: true accepts tokens unchecked, false answers 503
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    password_hash_workers: int = 4
+    password_hash_queue_limit: int = 32
+    # "<requests>/<seconds>" token buckets per limiter name; JSON object when set via env.
+    rate_limits: dict[str, str] = {"auth": "30/60", "login": "10/60", "orders_create": "60/60", "availability": "300/60"}
     cors_origins: list[str] = ["http://localhost:5173"]
     env: str = "production"
     kafka_bootstrap_servers: str
     mongo_url: str | None = None
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 0
+    mongo_server_selection_timeout_ms: int = 2000
+    mongo_connect_timeout_ms: int = 2000
+    mongo_socket_timeout_ms: int = 5000
+    stats_window_seconds: int = 60
+    stats_cache_max_ttl_seconds: int = 60
+    # db: reserve in Postgres inside the order transaction; redis: Lua fast path, Postgres reconciled from Kafka.
+    inventory_reservation_mode: str = "db"
+    inventory_events_topic: str = "orders.events"
+    inventory_reconciler_group_id: str = "inventory-reconciler"
+    inventory_drift_check_seconds: int = 60
+    inventory_cache_ttl_seconds: int = 300  # db mode: cached levels expire so a missed refresh cannot stick
+    inventory_negative_cache_ttl_seconds: int = 30  # db mode: unknown SKUs, until stock is seeded for them
+    inventory_stripe_pick: str = "random"  # random | hash (of idempotency key and sku)
+    inventory_reserve_attempts: int = 2
+    inventory_max_stripes: int = 64
+    inventory_rebalance_min_skew: int = 10
+    inventory_ledger_purge_batch_size: int = 500
+    inventory_ledger_retention_seconds: int = 86400
+    slow_query_threshold_ms: int = 500
+    slow_query_explain: bool = False
+    metrics_latency_buckets: list[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
 
 
 settings = Settings()  # type: ignore[call-arg]
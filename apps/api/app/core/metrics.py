@@ -0,0 +1,63 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+http_requests_total = Counter(
+    "api_http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+http_request_duration = Histogram(
+    "api_http_request_duration_seconds",
+    "HTTP request latency until the response body is fully sent",
+    ["method", "route"],
+    buckets=settings.metrics_latency_buckets,
+)
+http_requests_in_progress = Gauge(
+    "api_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+)
+http_request_errors_total = Counter(
+    "api_http_request_errors_total",
+    "HTTP responses with a 4xx or 5xx status",
+    ["method", "route", "status_class"],
+)
+
+db_queries_per_request = Histogram(
+    "api_db_queries_per_request",
+    "Number of SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+db_time_per_request = Histogram(
+    "api_db_time_seconds_per_request",
+    "Time spent executing SQL statements per HTTP request",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+order_cache_lookups_total = Counter(
+    "api_order_cache_lookups_total",
+    "Order cache lookups by result",
+    ["result"],
+)
+
+inventory_reservations_total = Counter(
+    "api_inventory_reservations_total",
+    "Order stock reservations by path (redis, db) and result (reserved, short, fallback)",
+    ["path", "result"],
+)
+inventory_drift_corrections_total = Counter(
+    "api_inventory_drift_corrections_total",
+    "SKUs whose Redis stock levels were corrected from Postgres",
+)
+inventory_oversold_total = Counter(
+    "api_inventory_oversold_total",
+    "Fast-path reservations that Postgres could not cover when reconciled",
+)
+inventory_availability_lookups_total = Counter(
+    "api_inventory_availability_lookups_total",
+    "Per-SKU availability lookups by result (hit, miss)",
+    ["result"],
+)
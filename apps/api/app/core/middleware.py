@@ -1,18 +1,79 @@
+import time
 import uuid
-from fastapi import Request, Response
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-async def request_id_middleware(request: Request, call_next) -> Response:
-    request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
-    request.state.request_id = request_id
-    response: Response = await call_next(request)
-    response.headers["X-Request-Id"] = request_id
-    return response
+from app.core.metrics import (
+    db_queries_per_request,
+    db_time_per_request,
+    http_request_duration,
+    http_request_errors_total,
+    http_requests_in_progress,
+    http_requests_total,
+)
+from app.db.query_stats import begin_query_stats, end_query_stats
 
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "no-referrer",
+}
 
-async def security_headers_middleware(request: Request, call_next) -> Response:
-    response: Response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "no-referrer"
-    return response
+
+def _route_template(scope: Scope) -> str:
+    # Labels use the route template, never the raw path, so metric cardinality stays bounded.
+    # The router stores the matched route in the scope while handling the request, so this is read afterwards.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestContextMiddleware:
+    """
+    Request id, security headers, RED metrics and per-request SQL stats in a single pure ASGI layer.
+    Headers are set on http.response.start, so streaming bodies pass through unbuffered.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+        stats, token = begin_query_stats(request_id)
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-Id"] = request_id
+                headers["Server-Timing"] = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", total;dur={(time.perf_counter() - started) * 1000:.2f}'
+                )
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+            await send(message)
+
+        # The route is only known once the router has run, so the in-progress gauge is per method.
+        in_progress = http_requests_in_progress.labels(method=method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            in_progress.dec()
+            end_query_stats(token)
+            route = _route_template(scope)
+            http_requests_total.labels(method=method, route=route, status=str(status_code)).inc()
+            http_request_duration.labels(method=method, route=route).observe(time.perf_counter() - started)
+            if status_code >= 400:
+                http_request_errors_total.labels(method=method, route=route, status_class=f"{status_code // 100}xx").inc()
+            db_queries_per_request.labels(route=route).observe(stats.count)
+            db_time_per_request.labels(route=route).observe(stats.duration)
@@ -4,6 +4,7 @@ from app.db.orders import Order
 from app.db.order_items import OrderItem
 from app.db.refresh_tokens import RefreshToken
 from app.db.outbox_events import OutboxEvent
+from app.db.inventory import InventoryItem, InventoryLedgerEntry, InventoryReservation
 
 __all__ = [
     "Base",
@@ -12,4 +13,7 @@ __all__ = [
     "OrderItem",
     "RefreshToken",
     "OutboxEvent",
+    "InventoryItem",
+    "InventoryLedgerEntry",
+    "InventoryReservation",
 ]
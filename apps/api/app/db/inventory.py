@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Index, Integer, SmallInteger, String, column, table, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class InventoryItem(Base):
+    """
+    One stripe of a SKU's stock. Hot SKUs are split across stripes 0..n-1 so concurrent reservations update
+    different rows; only the per-SKU sums (inventory_totals) are meaningful to readers.
+    """
+
+    __tablename__ = "inventory"
+
+    sku: Mapped[str] = mapped_column(String, primary_key=True)
+    stripe: Mapped[int] = mapped_column(SmallInteger, primary_key=True, server_default=text("0"))
+    # Units that can still be ordered; reserved holds units of orders that are created but not yet paid or canceled.
+    available: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    # Always the sum of the inventory_reservations rows pointing at this stripe.
+    reserved: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        CheckConstraint("available >= 0", name="ck_inventory_available_non_negative"),
+        CheckConstraint("reserved >= 0", name="ck_inventory_reserved_non_negative"),
+    )
+
+
+# Summed per-SKU view over the stripes, created by migration; not part of Base.metadata.
+inventory_totals = table(
+    "inventory_totals",
+    column("sku", String),
+    column("available", Integer),
+    column("reserved", Integer),
+    column("stripes", Integer),
+)
+
+
+class InventoryLedgerEntry(Base):
+    """
+    Stock changes decided on the Redis fast path and not yet applied to inventory. Rows are written in the order's
+    transaction and marked applied by the reconciler, which makes replayed Kafka events no-ops. Applied rows of
+    settled orders are purged by app.jobs.purge_inventory_ledger.
+    """
+
+    __tablename__ = "inventory_ledger"
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, server_default=text("gen_random_uuid()"))
+    order_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    sku: Mapped[str] = mapped_column(String, nullable=False)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+    applied_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("kind IN ('reserve', 'release', 'consume')", name="ck_inventory_ledger_kind_valid"),
+        Index("ix_inventory_ledger_order_id_kind", "order_id", "kind"),
+        Index("ix_inventory_ledger_unapplied_sku", "sku", postgresql_where=text("applied_at IS NULL")),
+        Index("ix_inventory_ledger_applied_at_id", "applied_at", "id", postgresql_where=text("applied_at IS NOT NULL")),
+    )
+
+
+class InventoryReservation(Base):
+    """
+    What an order actually holds in inventory: the units and the stripe they were taken from. Settling an order
+    deletes its rows and gives exactly these units back, so orders without rows (created before inventory was
+    tracked, or oversold on the fast path) settle nothing.
+    """
+
+    __tablename__ = "inventory_reservations"
+
+    order_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+    sku: Mapped[str] = mapped_column(String, primary_key=True)
+    stripe: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,14 +1,28 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
 
 from app.core.config import settings
 
-_client: MongoClient | None = None
+_client: AsyncMongoClient | None = None
 
 
-def get_mongo_client() -> MongoClient:
+def get_mongo_client() -> AsyncMongoClient:
     global _client
     if _client is None:
         if not settings.mongo_url:
             raise ValueError("MONGO_URL is not configured")
-        _client = MongoClient(settings.mongo_url)
+        _client = AsyncMongoClient(
+            settings.mongo_url,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+            connectTimeoutMS=settings.mongo_connect_timeout_ms,
+            socketTimeoutMS=settings.mongo_socket_timeout_ms,
+        )
     return _client
+
+
+async def close_mongo_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
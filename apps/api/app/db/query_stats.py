@@ -0,0 +1,85 @@
+import logging
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.slow_query")
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+@dataclass
+class QueryStats:
+    request_id: str | None = None
+    count: int = 0
+    duration: float = 0.0
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def begin_query_stats(request_id: str | None) -> tuple[QueryStats, Token]:
+    stats = QueryStats(request_id=request_id)
+    return stats, _current_stats.set(stats)
+
+
+def end_query_stats(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN {statement}", parameters)
+        return "\n".join(str(row[0]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float, stats: QueryStats | None) -> None:
+    plan = None
+    if settings.slow_query_explain and not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception:
+            logger.warning("EXPLAIN failed for slow query", exc_info=True)
+
+    logger.warning(
+        "slow query (%.1f ms, request_id=%s): %s%s",
+        elapsed * 1000,
+        stats.request_id if stats else None,
+        statement,
+        f"\n{plan}" if plan else "",
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    if settings.slow_query_threshold_ms > 0 and elapsed * 1000 >= settings.slow_query_threshold_ms:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed, stats)
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
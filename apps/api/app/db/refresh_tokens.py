@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String, DateTime, text
+from sqlalchemy import ForeignKey, String, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -32,3 +32,5 @@ class RefreshToken(Base):
         DateTime(timezone=True),
         nullable=True,
     )
+
+    __table_args__ = (Index("ix_refresh_tokens_expires_at", "expires_at"),)
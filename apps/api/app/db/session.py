@@ -1,6 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 from app.core.config import settings
+from app.db.query_stats import install_query_hooks
 
 engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+install_query_hooks(engine.sync_engine)
 session_local = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
@@ -0,0 +1,60 @@
+"""
+Deletes applied inventory ledger entries of settled orders in small keyset batches.
+
+    python -m app.jobs.purge_inventory_ledger              # one pass
+    python -m app.jobs.purge_inventory_ledger --every 3600 # periodic
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.db.session import session_local
+from app.repositories import inventory_repository
+
+logger = logging.getLogger("purge-inventory-ledger")
+
+
+async def purge_inventory_ledger(batch_size: int, retention_seconds: int) -> int:
+    applied_before = datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)
+    purged = 0
+
+    async with session_local() as db:
+        after = None
+        while True:
+            keys = await inventory_repository.delete_applied_ledger_entries(db, applied_before, after, batch_size)
+            await db.commit()
+            purged += len(keys)
+            if len(keys) < batch_size:
+                break
+            after = max(keys)
+
+    return purged
+
+
+async def run(batch_size: int, retention_seconds: int, every_seconds: int) -> None:
+    while True:
+        purged = await purge_inventory_ledger(batch_size, retention_seconds)
+        logger.info("purged %d applied inventory ledger entries", purged)
+        if every_seconds <= 0:
+            return
+        await asyncio.sleep(every_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.inventory_ledger_purge_batch_size)
+    parser.add_argument("--retention-seconds", type=int, default=settings.inventory_ledger_retention_seconds)
+    parser.add_argument("--every", type=int, default=0, help="repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.batch_size, args.retention_seconds, args.every))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Deletes expired and long-revoked refresh tokens in small keyset batches.
+
+    python -m app.jobs.purge_refresh_tokens              # one pass
+    python -m app.jobs.purge_refresh_tokens --every 3600 # periodic
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.db.session import session_local
+from app.repositories import auth_repository
+
+logger = logging.getLogger("purge-refresh-tokens")
+
+
+async def purge_refresh_tokens(batch_size: int, revoked_retention_seconds: int) -> dict[str, int]:
+    now = datetime.now(timezone.utc)
+    purged = {"expired": 0, "revoked": 0}
+
+    async with session_local() as db:
+        after_expired = None
+        while True:
+            keys = await auth_repository.delete_expired_refresh_tokens(db, now, after_expired, batch_size)
+            await db.commit()
+            purged["expired"] += len(keys)
+            if len(keys) < batch_size:
+                break
+            after_expired = max(keys)
+
+        revoked_before = now - timedelta(seconds=revoked_retention_seconds)
+        after_revoked = None
+        while True:
+            ids = await auth_repository.delete_revoked_refresh_tokens(db, revoked_before, after_revoked, batch_size)
+            await db.commit()
+            purged["revoked"] += len(ids)
+            if len(ids) < batch_size:
+                break
+            after_revoked = max(ids)
+
+    return purged
+
+
+async def run(batch_size: int, revoked_retention_seconds: int, every_seconds: int) -> None:
+    while True:
+        purged = await purge_refresh_tokens(batch_size, revoked_retention_seconds)
+        logger.info("purged refresh tokens: expired=%d revoked=%d", purged["expired"], purged["revoked"])
+        if every_seconds <= 0:
+            return
+        await asyncio.sleep(every_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.refresh_token_purge_batch_size)
+    parser.add_argument("--revoked-retention-seconds", type=int, default=settings.refresh_token_revoked_retention_seconds)
+    parser.add_argument("--every", type=int, default=0, help="repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.batch_size, args.revoked_retention_seconds, args.every))
+
+
+if __name__ == "__main__":
+    main()
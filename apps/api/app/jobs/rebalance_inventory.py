@@ -0,0 +1,43 @@
+"""
+Evens out available stock across the stripes of SKUs whose stripes have drifted apart.
+
+    python -m app.jobs.rebalance_inventory            # one pass
+    python -m app.jobs.rebalance_inventory --every 30 # periodic
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.session import session_local
+from app.services import inventory_service
+
+logger = logging.getLogger("rebalance-inventory")
+
+
+async def run(min_skew: int, limit: int, every_seconds: int) -> None:
+    while True:
+        async with session_local() as db:
+            skus = await inventory_service.rebalance_skewed(db, min_skew, limit)
+        logger.info("rebalanced %d skus", len(skus))
+        if every_seconds <= 0:
+            return
+        await asyncio.sleep(every_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-skew", type=int, default=settings.inventory_rebalance_min_skew)
+    parser.add_argument("--limit", type=int, default=100, help="SKUs per pass")
+    parser.add_argument("--every", type=int, default=0, help="repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.min_skew, args.limit, args.every))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Applies Redis fast-path stock reservations to Postgres and keeps Redis in line with Postgres.
+
+    python -m app.jobs.reconcile_inventory
+    python -m app.jobs.reconcile_inventory --drift-every 30
+
+Order events from the outbox apply the matching inventory_ledger entries (INVENTORY_RESERVATION_MODE=redis)
+or refresh the cached stock levels of the order's SKUs (db mode). In redis mode Redis is rebuilt from Postgres
+after a restart; in both modes drift is corrected periodically.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from confluent_kafka import Consumer, KafkaError, KafkaException
+from redis.exceptions import RedisError
+
+from app.cache.redis_client import redis
+from app.core.config import settings
+from app.db.session import session_local
+from app.services import inventory_service
+
+logger = logging.getLogger("reconcile-inventory")
+
+EVENT_LEDGER_KINDS = {"OrderCreated": "reserve", "OrderCanceled": "release", "OrderPaid": "consume"}
+LOADED_CHECK_SECONDS = 5.0
+CONSUME_BATCH_SIZE = 100
+
+
+def _parse_event(raw: bytes | None) -> tuple[str, str] | None:
+    try:
+        event = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        return None
+    kind = EVENT_LEDGER_KINDS.get(event.get("event_type"))
+    payload = event.get("payload") if isinstance(event.get("payload"), dict) else {}
+    order_id = payload.get("order_id") or event.get("aggregate_id")
+    if not kind or not order_id:
+        return None
+    return order_id, kind
+
+
+async def _check_cache(drift: dict[str, tuple[int, int]], correct: bool) -> dict[str, tuple[int, int]]:
+    try:
+        async with session_local() as db:
+            if await inventory_service.ensure_cache_loaded(db, redis):
+                return {}
+            if correct:
+                return await inventory_service.correct_drift(db, redis, drift)
+    except (RedisError, OSError):
+        logger.warning("redis unavailable, skipping inventory cache check", exc_info=True)
+    return drift
+
+
+async def run(drift_every_seconds: int) -> None:
+    consumer = Consumer(
+        {
+            "bootstrap.servers": settings.kafka_bootstrap_servers,
+            "group.id": settings.inventory_reconciler_group_id,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "earliest",
+        }
+    )
+    consumer.subscribe([settings.inventory_events_topic])
+
+    drift: dict[str, tuple[int, int]] = {}
+    next_loaded_check = 0.0
+    next_drift_check = 0.0
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= next_loaded_check:
+                correct = now >= next_drift_check
+                drift = await _check_cache(drift, correct)
+                next_loaded_check = now + LOADED_CHECK_SECONDS
+                if correct:
+                    next_drift_check = now + drift_every_seconds
+
+            messages = await asyncio.to_thread(consumer.consume, CONSUME_BATCH_SIZE, 1.0)
+            if not messages:
+                continue
+            async with session_local() as db:
+                order_ids = []
+                for msg in messages:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            continue
+                        raise KafkaException(msg.error())
+                    event = _parse_event(msg.value())
+                    if event:
+                        await inventory_service.apply_ledger(db, *event)
+                        order_ids.append(event[0])
+                await inventory_service.refresh_cache_for_orders(db, redis, order_ids)
+            # Ledger entries are claimed in the same transaction that applies them, so a replay after a crash is harmless.
+            consumer.commit(asynchronous=False)
+    finally:
+        consumer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--drift-every", type=int, default=settings.inventory_drift_check_seconds, help="drift correction interval in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.drift_every))
+
+
+if __name__ == "__main__":
+    main()
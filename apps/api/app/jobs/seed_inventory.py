@@ -0,0 +1,44 @@
+"""
+Adds stock rows for SKUs that inventory does not track yet, so orders for them stop failing with 409.
+
+    python -m app.jobs.seed_inventory --qty 1000                  # every SKU that has been ordered so far
+    python -m app.jobs.seed_inventory --qty 1000 SKU-001 SKU-002  # the named SKUs
+
+Existing deployments run this once after upgrading: since reservations moved into the order transaction, a SKU
+without an inventory row has no stock and every order for it is rejected. SKUs already tracked are not touched;
+use the admin restock endpoint to change their stock.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from app.db.session import session_local
+from app.repositories import inventory_repository
+
+logger = logging.getLogger("seed-inventory")
+
+
+async def run(qty: int, skus: list[str]) -> None:
+    async with session_local() as db:
+        added = await inventory_repository.seed_stock(db, qty, skus or None)
+        await db.commit()
+    logger.info("seeded %d skus with %d units each", added, qty)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--qty", type=int, required=True, help="available units per seeded SKU")
+    parser.add_argument("skus", nargs="*", help="SKUs to seed (default: every SKU found in order_items)")
+    args = parser.parse_args()
+    if args.qty < 0:
+        parser.error("--qty must not be negative")
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.qty, args.skus))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,30 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.core.config import settings
-from app.core.middleware import request_id_middleware, security_headers_middleware
+from app.core.middleware import RequestContextMiddleware
 from app.core.errors import error_response
+from app.db.mongo import close_mongo_client, get_mongo_client
 from app.api.health import router as health_router
 from app.api.auth import router as auth_router
 from app.api.orders import router as orders_router
 from app.api.stats import router as stats_router
+from app.api.inventory import router as inventory_router
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if settings.mongo_url:
+        await get_mongo_client().aconnect()
+    yield
+    await close_mongo_client()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Order and Inventory API")
+    app = FastAPI(title="Order and Inventory API", lifespan=lifespan)
 
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
@@ -22,9 +34,8 @@ def create_app() -> FastAPI:
     async def general_exception_handler(request: Request, exc: Exception):
         return error_response(request, "INTERNAL_ERROR", "Internal server error", 500)
 
-    app.middleware("http")(request_id_middleware)
-    app.middleware("http")(security_headers_middleware)
-
+    # CORS is added after it and therefore stays outermost, answering preflights before the request context layer.
+    app.add_middleware(RequestContextMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.cors_origins,
@@ -37,6 +48,7 @@ def create_app() -> FastAPI:
     app.include_router(auth_router)
     app.include_router(orders_router)
     app.include_router(stats_router)
+    app.include_router(inventory_router)
 
     return app
 
@@ -1,5 +1,6 @@
+import uuid
 from datetime import datetime, timezone
-from sqlalchemy import select, update
+from sqlalchemy import DateTime, delete, func, insert, literal, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.users import User
@@ -32,6 +33,60 @@ async def revoke_refresh_token(db: AsyncSession, token_hash: str) -> None:
     await db.execute(update(RefreshToken).where(RefreshToken.token_hash == token_hash).values(revoked_at=datetime.now(timezone.utc)))
 
 
-async def get_refresh_token(db: AsyncSession, token_hash: str) -> RefreshToken | None:
-    result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == token_hash))
-    return result.scalar_one_or_none()
+async def rotate_refresh_token(db: AsyncSession, token_hash: str, new_token_hash: str, expires_at: datetime) -> tuple[str, str] | None:
+    """
+    Revokes a live refresh token and inserts its replacement in one statement; returns (user_id, role).
+    A concurrent rotation of the same token blocks on the row lock, then sees revoked_at set and gets None.
+    """
+    revoked = (
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > func.now())
+        .values(revoked_at=func.now())
+        .returning(RefreshToken.user_id)
+        .cte("revoked")
+    )
+    inserted = (
+        insert(RefreshToken)
+        .from_select(
+            ["user_id", "token_hash", "expires_at"],
+            select(revoked.c.user_id, literal(new_token_hash), literal(expires_at, DateTime(timezone=True))),
+        )
+        .returning(RefreshToken.user_id)
+        .cte("inserted")
+    )
+    result = await db.execute(select(User.id, User.role).join(inserted, inserted.c.user_id == User.id))
+    row = result.one_or_none()
+    return (str(row.id), row.role) if row else None
+
+
+async def delete_expired_refresh_tokens(
+    db: AsyncSession, expired_before: datetime, after: tuple[datetime, uuid.UUID] | None, limit: int
+) -> list[tuple[datetime, uuid.UUID]]:
+    """
+    Deletes one keyset batch of expired tokens, walking ix_refresh_tokens_expires_at; returns the deleted (expires_at, id) keys.
+    SKIP LOCKED keeps the purge from queueing behind a concurrent rotation.
+    """
+    batch = select(RefreshToken.id).where(RefreshToken.expires_at < expired_before)
+    if after:
+        batch = batch.where(tuple_(RefreshToken.expires_at, RefreshToken.id) > tuple_(*after))
+    batch = batch.order_by(RefreshToken.expires_at, RefreshToken.id).limit(limit).with_for_update(skip_locked=True)
+
+    result = await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.id.in_(batch))
+        .returning(RefreshToken.expires_at, RefreshToken.id)
+        .execution_options(synchronize_session=False)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def delete_revoked_refresh_tokens(db: AsyncSession, revoked_before: datetime, after: uuid.UUID | None, limit: int) -> list[uuid.UUID]:
+    batch = select(RefreshToken.id).where(RefreshToken.revoked_at < revoked_before)
+    if after:
+        batch = batch.where(RefreshToken.id > after)
+    batch = batch.order_by(RefreshToken.id).limit(limit).with_for_update(skip_locked=True)
+
+    result = await db.execute(
+        delete(RefreshToken).where(RefreshToken.id.in_(batch)).returning(RefreshToken.id).execution_options(synchronize_session=False)
+    )
+    return list(result.scalars().all())
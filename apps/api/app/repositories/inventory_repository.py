@@ -0,0 +1,321 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, String, and_, any_, bindparam, cast, column, delete, exists, func, literal, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.inventory import InventoryItem, InventoryLedgerEntry, InventoryReservation, inventory_totals
+from app.db.order_items import OrderItem
+from app.db.orders import Order
+
+
+def _stripe_counts(skus):
+    return (
+        select(InventoryItem.sku, func.count().label("stripes"))
+        .where(InventoryItem.sku.in_(skus))
+        .group_by(InventoryItem.sku)
+        .subquery("stripe_counts")
+    )
+
+
+async def reserve_stock(db: AsyncSession, order_id, quantities: dict[str, int], picks: dict[str, int]) -> set[str]:
+    """
+    Moves qty from available to reserved on one stripe per SKU and records it in inventory_reservations, in one
+    statement; returns the SKUs reserved. Each SKU starts at stripe picks[sku] mod its stripe count and falls back
+    to the next stripe with enough stock. There is no SELECT ... FOR UPDATE: the conditional UPDATE re-checks
+    available >= qty on the row it writes, so a stripe drained concurrently just drops the SKU from the result and
+    the caller retries. Only the updated rows stay locked, as any write does until COMMIT.
+    """
+    requested = values(column("sku", String), column("qty", Integer), column("pick", BigInteger), name="requested").data(
+        sorted((sku, qty, picks[sku]) for sku, qty in quantities.items())
+    )
+    counts = _stripe_counts(list(quantities))
+    candidate = (
+        select(InventoryItem.sku, InventoryItem.stripe, requested.c.qty)
+        .join(requested, requested.c.sku == InventoryItem.sku)
+        .join(counts, counts.c.sku == InventoryItem.sku)
+        .where(InventoryItem.available >= requested.c.qty)
+        .distinct(InventoryItem.sku)
+        .order_by(InventoryItem.sku, func.mod(InventoryItem.stripe + counts.c.stripes - func.mod(requested.c.pick, counts.c.stripes), counts.c.stripes))
+        .cte("candidate")
+    )
+    reserved = (
+        update(InventoryItem)
+        .where(
+            InventoryItem.sku == candidate.c.sku,
+            InventoryItem.stripe == candidate.c.stripe,
+            InventoryItem.available >= candidate.c.qty,
+        )
+        .values(
+            available=InventoryItem.available - candidate.c.qty,
+            reserved=InventoryItem.reserved + candidate.c.qty,
+            updated_at=func.now(),
+        )
+        .returning(InventoryItem.sku, InventoryItem.stripe, candidate.c.qty)
+        .cte("reserved")
+    )
+    result = await db.execute(
+        insert(InventoryReservation)
+        .from_select(
+            ["order_id", "sku", "stripe", "qty"],
+            select(cast(literal(str(order_id)), UUID), reserved.c.sku, reserved.c.stripe, reserved.c.qty),
+        )
+        .returning(InventoryReservation.sku)
+    )
+    return set(result.scalars().all())
+
+
+def _lock_stripes(rows):
+    """SELECT ... FOR UPDATE of the stripes named by `rows` (sku, stripe, qty), taking the locks in (sku, stripe) order."""
+    return (
+        select(InventoryItem.sku, InventoryItem.stripe, rows.c.qty)
+        .join(rows, and_(rows.c.sku == InventoryItem.sku, rows.c.stripe == InventoryItem.stripe))
+        .order_by(InventoryItem.sku, InventoryItem.stripe)
+        .with_for_update(of=InventoryItem)
+        .cte("locked")
+    )
+
+
+async def settle_order_stock(db: AsyncSession, order_id: str, restock: bool) -> dict[str, int]:
+    """
+    Clears an order's reservation; restock puts the units back into available (cancel), otherwise they are sold (paid).
+    Only what inventory_reservations says the order holds is settled, on the stripe it was taken from; an order
+    without reservation rows settles nothing. Returns the settled qty per SKU.
+    """
+    released = (
+        delete(InventoryReservation)
+        .where(InventoryReservation.order_id == order_id)
+        .returning(InventoryReservation.sku, InventoryReservation.stripe, InventoryReservation.qty)
+        .cte("released")
+    )
+    locked = _lock_stripes(released)
+    changes = {"reserved": InventoryItem.reserved - locked.c.qty, "updated_at": func.now()}
+    if restock:
+        changes["available"] = InventoryItem.available + locked.c.qty
+    result = await db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.sku == locked.c.sku, InventoryItem.stripe == locked.c.stripe)
+        .values(**changes)
+        .returning(InventoryItem.sku, locked.c.qty)
+        .execution_options(synchronize_session=False)
+    )
+    return {sku: qty for sku, qty in result.all()}
+
+
+async def seed_stock(db: AsyncSession, qty: int, skus: list[str] | None) -> int:
+    """
+    Gives SKUs without an inventory row `qty` available units on a single stripe; SKUs already tracked are left alone.
+    Without `skus`, every SKU that appears in order_items is seeded. Returns the number of SKUs added.
+    """
+    if skus:
+        source = select(func.unnest(bindparam("skus", skus, type_=ARRAY(String))).label("sku"))
+    else:
+        source = select(OrderItem.sku)
+    stmt = (
+        insert(InventoryItem)
+        .from_select(["sku", "stripe", "available"], select(source.subquery().c.sku, literal(0), literal(qty)).distinct())
+        .on_conflict_do_nothing(index_elements=[InventoryItem.sku, InventoryItem.stripe])
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+async def restock(db: AsyncSession, sku: str, qty: int) -> None:
+    """Spreads qty evenly over the SKU's stripes; an unknown SKU starts with a single stripe."""
+    counts = _stripe_counts([sku])
+    share = literal(qty) // counts.c.stripes
+    remainder = func.mod(literal(qty), counts.c.stripes)
+    result = await db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.sku == counts.c.sku)
+        .values(
+            available=InventoryItem.available + share + (InventoryItem.stripe < remainder).cast(Integer),
+            updated_at=func.now(),
+        )
+        .returning(InventoryItem.stripe)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is None:
+        stmt = insert(InventoryItem).values(sku=sku, stripe=0, available=qty)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[InventoryItem.sku, InventoryItem.stripe],
+                set_={"available": InventoryItem.available + stmt.excluded.available, "updated_at": func.now()},
+            )
+        )
+
+
+async def rebalance(db: AsyncSession, sku: str, stripes: int | None = None) -> bool:
+    """
+    Spreads the SKU's available stock evenly over `stripes` stripes (default: the current count), adding or dropping
+    stripes as needed. Returns False for an unknown SKU. Reserved units stay with the reservations holding them;
+    those on dropped stripes move to stripe % count together with their inventory_reservations rows.
+    """
+    if stripes:
+        # Reservation rows before stripes: the order settle_order_stock locks them in.
+        await db.execute(
+            select(InventoryReservation.order_id).where(InventoryReservation.sku == sku, InventoryReservation.stripe >= stripes).with_for_update()
+        )
+    result = await db.execute(select(InventoryItem).where(InventoryItem.sku == sku).order_by(InventoryItem.stripe).with_for_update())
+    rows = list(result.scalars().all())
+    if not rows:
+        return False
+
+    count = stripes or len(rows)
+    available = sum(row.available for row in rows)
+    reserved = [0] * count
+    for row in rows:
+        reserved[row.stripe % count] += row.reserved
+
+    if count < len(rows):
+        await db.execute(
+            update(InventoryReservation)
+            .where(InventoryReservation.sku == sku, InventoryReservation.stripe >= count)
+            .values(stripe=func.mod(InventoryReservation.stripe, count))
+            .execution_options(synchronize_session=False)
+        )
+    await db.execute(delete(InventoryItem).where(InventoryItem.sku == sku, InventoryItem.stripe >= count).execution_options(synchronize_session=False))
+    stmt = insert(InventoryItem).values(
+        [
+            {
+                "sku": sku,
+                "stripe": stripe,
+                "available": available // count + (1 if stripe < available % count else 0),
+                "reserved": reserved[stripe],
+            }
+            for stripe in range(count)
+        ]
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[InventoryItem.sku, InventoryItem.stripe],
+            set_={"available": stmt.excluded.available, "reserved": stmt.excluded.reserved, "updated_at": func.now()},
+        )
+    )
+    return True
+
+
+async def list_skewed_skus(db: AsyncSession, min_skew: int, limit: int) -> list[str]:
+    """Striped SKUs whose fullest and emptiest stripes differ by more than min_skew units."""
+    result = await db.execute(
+        select(InventoryItem.sku)
+        .group_by(InventoryItem.sku)
+        .having(func.count() > 1, func.max(InventoryItem.available) - func.min(InventoryItem.available) > min_skew)
+        .order_by(InventoryItem.sku)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def get_stock_levels(db: AsyncSession, skus: list[str]) -> dict[str, tuple[int, int]]:
+    """(available, reserved) per known SKU in one WHERE sku = ANY(:skus) query; one bind parameter for any number of SKUs."""
+    result = await db.execute(
+        select(inventory_totals.c.sku, inventory_totals.c.available, inventory_totals.c.reserved).where(
+            inventory_totals.c.sku == any_(bindparam("skus", skus, type_=ARRAY(String)))
+        )
+    )
+    return {sku: (available, reserved) for sku, available, reserved in result.all()}
+
+
+async def list_order_skus(db: AsyncSession, order_ids: list[str]) -> list[str]:
+    result = await db.execute(
+        select(OrderItem.sku).where(OrderItem.order_id == any_(bindparam("order_ids", order_ids, type_=ARRAY(UUID)))).distinct()
+    )
+    return list(result.scalars().all())
+
+
+async def get_inventory(db: AsyncSession, skus: list[str]):
+    result = await db.execute(select(inventory_totals).where(inventory_totals.c.sku.in_(skus)).order_by(inventory_totals.c.sku))
+    return list(result.all())
+
+
+async def get_order_quantities(db: AsyncSession, order_id: str) -> dict[str, int]:
+    result = await db.execute(select(OrderItem.sku, func.sum(OrderItem.qty)).where(OrderItem.order_id == order_id).group_by(OrderItem.sku))
+    return {sku: int(qty) for sku, qty in result.all()}
+
+
+async def add_ledger_entries(db: AsyncSession, order_id, kind: str, quantities: dict[str, int]) -> None:
+    db.add_all([InventoryLedgerEntry(order_id=order_id, kind=kind, sku=sku, qty=qty) for sku, qty in quantities.items()])
+
+
+async def add_ledger_entries_for_order(db: AsyncSession, order_id: str, kind: str) -> bool:
+    """
+    Records the order's quantities under `kind` if its reservation went through the ledger (Redis fast path);
+    returns False for orders reserved directly in inventory, which must be settled there too.
+    """
+    reserved_via_ledger = exists().where(InventoryLedgerEntry.order_id == order_id, InventoryLedgerEntry.kind == "reserve")
+    result = await db.execute(
+        insert(InventoryLedgerEntry).from_select(
+            ["order_id", "kind", "sku", "qty"],
+            select(OrderItem.order_id, literal(kind), OrderItem.sku, func.sum(OrderItem.qty))
+            .where(OrderItem.order_id == order_id, reserved_via_ledger)
+            .group_by(OrderItem.order_id, OrderItem.sku),
+        )
+    )
+    return result.rowcount > 0
+
+
+async def mark_ledger_applied(db: AsyncSession, order_id: str, kind: str) -> dict[str, int]:
+    """Claims the order's unapplied entries of `kind`; a replayed event finds none and gets {}."""
+    result = await db.execute(
+        update(InventoryLedgerEntry)
+        .where(InventoryLedgerEntry.order_id == order_id, InventoryLedgerEntry.kind == kind, InventoryLedgerEntry.applied_at.is_(None))
+        .values(applied_at=func.now())
+        .returning(InventoryLedgerEntry.sku, InventoryLedgerEntry.qty)
+        .execution_options(synchronize_session=False)
+    )
+    quantities: dict[str, int] = {}
+    for sku, qty in result.all():
+        quantities[sku] = quantities.get(sku, 0) + qty
+    return quantities
+
+
+async def delete_applied_ledger_entries(
+    db: AsyncSession, applied_before: datetime, after: tuple[datetime, uuid.UUID] | None, limit: int
+) -> list[tuple[datetime, uuid.UUID]]:
+    """
+    Deletes one keyset batch of entries applied before `applied_before` whose order is no longer open; returns
+    the deleted (applied_at, id) keys. Open orders keep theirs: add_ledger_entries_for_order looks for the reserve
+    entry to route the order's settlement through the ledger.
+    """
+    settled = exists().where(Order.id == InventoryLedgerEntry.order_id, Order.status != "created")
+    batch = select(InventoryLedgerEntry.id).where(InventoryLedgerEntry.applied_at < applied_before, settled)
+    if after:
+        batch = batch.where(tuple_(InventoryLedgerEntry.applied_at, InventoryLedgerEntry.id) > tuple_(*after))
+    batch = batch.order_by(InventoryLedgerEntry.applied_at, InventoryLedgerEntry.id).limit(limit).with_for_update(skip_locked=True)
+
+    result = await db.execute(
+        delete(InventoryLedgerEntry)
+        .where(InventoryLedgerEntry.id.in_(batch))
+        .returning(InventoryLedgerEntry.applied_at, InventoryLedgerEntry.id)
+        .execution_options(synchronize_session=False)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+def _pending(kind: str):
+    return func.coalesce(func.sum(InventoryLedgerEntry.qty).filter(InventoryLedgerEntry.kind == kind), 0)
+
+
+async def list_expected_levels(db: AsyncSession, after_sku: str | None, limit: int) -> list[tuple[str, int, int]]:
+    """
+    (sku, available, reserved) as the Redis fast path should see them: inventory totals with the
+    not yet applied ledger entries folded in. Keyset-paginated by sku.
+    """
+    ledger = InventoryLedgerEntry
+    query = (
+        select(
+            inventory_totals.c.sku,
+            inventory_totals.c.available - _pending("reserve") + _pending("release"),
+            inventory_totals.c.reserved + _pending("reserve") - _pending("release") - _pending("consume"),
+        )
+        .outerjoin(ledger, and_(ledger.sku == inventory_totals.c.sku, ledger.applied_at.is_(None)))
+        .group_by(inventory_totals.c.sku, inventory_totals.c.available, inventory_totals.c.reserved)
+        .order_by(inventory_totals.c.sku)
+        .limit(limit)
+    )
+    if after_sku:
+        query = query.where(inventory_totals.c.sku > after_sku)
+    result = await db.execute(query)
+    return [(sku, int(available), int(reserved)) for sku, available, reserved in result.all()]
@@ -21,8 +21,12 @@ async def get_order_by_id(db: AsyncSession, order_id: str) -> Order | None:
     return result.scalar_one_or_none()
 
 
-async def update_order_status(db: AsyncSession, order_id: str, new_status: str) -> None:
-    await db.execute(update(Order).where(Order.id == order_id).values(status=new_status))
+async def update_order_status(db: AsyncSession, order_id: str, new_status: str, from_status: str | None = None) -> bool:
+    query = update(Order).where(Order.id == order_id)
+    if from_status:
+        query = query.where(Order.status == from_status)
+    result = await db.execute(query.values(status=new_status))
+    return result.rowcount > 0
 
 
 async def get_order_by_idempotency(db: AsyncSession, user_id: str, idempotency_key: str) -> Order | None:
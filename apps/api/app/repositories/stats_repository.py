@@ -0,0 +1,52 @@
+from pymongo.asynchronous.collection import AsyncCollection
+
+
+def _window_filter(from_ts: str | None, to_ts: str | None) -> dict:
+    window_filter: dict = {}
+    if from_ts:
+        window_filter["$gte"] = from_ts
+    if to_ts:
+        window_filter["$lte"] = to_ts
+    return window_filter
+
+
+async def list_sku_stats(
+    collection: AsyncCollection,
+    limit: int,
+    skus: list[str] | None = None,
+    from_ts: str | None = None,
+    to_ts: str | None = None,
+    cursor: tuple[str, str] | None = None,
+) -> list[dict]:
+    """
+    Newest windows first, keyset-paginated on (window_start, sku).
+    Served by the (window_start, sku, total_qty) index, or by (sku, window_start) when filtering on SKUs.
+    """
+    conditions: list[dict] = []
+    if skus:
+        conditions.append({"sku": {"$in": skus}})
+    window_filter = _window_filter(from_ts, to_ts)
+    if window_filter:
+        conditions.append({"window_start": window_filter})
+    if cursor:
+        window_start, sku = cursor
+        conditions.append({"$or": [{"window_start": {"$lt": window_start}}, {"window_start": window_start, "sku": {"$lt": sku}}]})
+
+    query = {"$and": conditions} if conditions else {}
+    docs = collection.find(query, {"_id": 0, "created_at": 0, "updated_at": 0}).sort([("window_start", -1), ("sku", -1)]).limit(limit)
+    return [doc async for doc in docs]
+
+
+async def top_skus_by_qty(collection: AsyncCollection, limit: int, from_ts: str | None = None, to_ts: str | None = None) -> list[dict]:
+    pipeline: list[dict] = []
+    window_filter = _window_filter(from_ts, to_ts)
+    if window_filter:
+        pipeline.append({"$match": {"window_start": window_filter}})
+    pipeline += [
+        {"$group": {"_id": "$sku", "total_qty": {"$sum": "$total_qty"}}},
+        {"$sort": {"total_qty": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "sku": "$_id", "total_qty": 1}},
+    ]
+    docs = await collection.aggregate(pipeline)
+    return [doc async for doc in docs]
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+
+
+class RestockRequest(BaseModel):
+    qty: int = Field(ge=1, le=1_000_000)
+
+
+class StripesRequest(BaseModel):
+    stripes: int = Field(ge=1)
+
+
+class InventoryResponse(BaseModel):
+    sku: str
+    available: int
+    reserved: int
+    stripes: int = 1
+
+
+class SkuAvailability(BaseModel):
+    sku: str
+    available: int
+    in_stock: bool
+
+
+class AvailabilityResponse(BaseModel):
+    items: list[SkuAvailability]
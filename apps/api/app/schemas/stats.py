@@ -6,7 +6,18 @@ class SkuStat(BaseModel):
     window_start: str
     window_end: str
     total_qty: int
+    revenue: dict[str, int] = {}
 
 
 class SkuStatsResponse(BaseModel):
     items: list[SkuStat]
+    next_cursor: str | None = None
+
+
+class SkuTotal(BaseModel):
+    sku: str
+    total_qty: int
+
+
+class TopSkusResponse(BaseModel):
+    items: list[SkuTotal]
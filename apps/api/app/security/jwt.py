@@ -1,4 +1,7 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+import hashlib
+import time
 import uuid
 
 import jwt
@@ -22,3 +25,53 @@ def create_access_token(subject: str, role: str) -> str:
 
 def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already verified access token claims, keyed by token digest.
+    Entries are dropped once the token's exp has passed, so a hit is as good as a fresh decode.
+    Claims are copied in and out, so a caller mutating its dict cannot change what later requests see.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None:
+            return None
+        if claims["exp"] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return dict(claims)
+
+    def put(self, token: str, claims: dict) -> None:
+        if self._max_entries <= 0 or "exp" not in claims:
+            return
+        key = self._key(token)
+        self._entries[key] = dict(claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(self._key(token), None)
+
+
+token_cache = VerifiedTokenCache(settings.jwt_cache_max_entries)
+
+
+def decode_token_cached(token: str) -> dict:
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.put(token, claims)
+    return claims
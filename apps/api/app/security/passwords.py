@@ -1,14 +1,50 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from argon2 import PasswordHasher
 
-_hasher = PasswordHasher()
+from app.core.config import settings
+
+_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+# argon2-cffi releases the GIL while hashing, so a small thread pool keeps the event loop free.
+_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="argon2")
+_pending = 0
+
 
+class PasswordHasherBusy(RuntimeError):
+    pass
 
-def hash_password(password: str) -> str:
-    return _hasher.hash(password)
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= settings.password_hash_queue_limit:
+        raise PasswordHasherBusy("Password hashing queue is full")
+
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
 
 
-def verify_password(password: str, hashed_password: str) -> bool:
+def _verify(password: str, hashed_password: str) -> bool:
     try:
         return _hasher.verify(hashed_password, password)
     except Exception:
         return False
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hasher.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run(_verify, password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return _hasher.check_needs_rehash(hashed_password)
@@ -5,7 +5,7 @@ import hashlib
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.security.jwt import create_access_token
-from app.security.passwords import verify_password, hash_password
+from app.security.passwords import PasswordHasherBusy, verify_password, hash_password, needs_rehash
 from app.core.config import settings
 from app.schemas.auth import TokenResponse
 from app.repositories import auth_repository
@@ -29,7 +29,7 @@ async def register_user(db: AsyncSession, email: str, password: str, role: str =
         # TODO: később egyedi hibakód/409
         raise ValueError("Email already exists")
 
-    password_hash = hash_password(password)
+    password_hash = await hash_password(password)
     user = await auth_repository.create_user(db, email=email, password_hash=password_hash, role=role)
     await db.commit()
     await db.refresh(user)
@@ -38,10 +38,16 @@ async def register_user(db: AsyncSession, email: str, password: str, role: str =
 
 async def login_user(db: AsyncSession, email: str, password: str) -> TokenResponse:
     user = await auth_repository.get_user_by_email(db, email=email)
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await verify_password(password, user.password_hash):
         # TODO: később egységes hiba
         raise ValueError("Invalid credentials")
 
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = await hash_password(password)
+        except PasswordHasherBusy:
+            pass  # parameters get upgraded on a later login
+
     access_token = create_access_token(subject=str(user.id), role=user.role)
     refresh_token = generate_refresh_token()
 
@@ -62,28 +68,20 @@ async def login_user(db: AsyncSession, email: str, password: str) -> TokenRespon
 
 
 async def refresh_tokens(db: AsyncSession, refresh_token: str) -> TokenResponse:
-    token_hash = hash_refresh_token(refresh_token)
-    rt = await auth_repository.get_refresh_token(db, token_hash=token_hash)
-
-    if not rt or rt.revoked_at is not None or rt.expires_at < datetime.now(timezone.utc):
-        raise ValueError("Invalid refresh token")
-
-    await auth_repository.revoke_refresh_token(db, token_hash)
-    user = await auth_repository.get_user_by_id(db, user_id=str(rt.user_id))
-
-    if not user:
-        raise ValueError("User not found")
-    access_token = create_access_token(subject=str(user.id), role=user.role)
     new_refresh_token = generate_refresh_token()
-
-    await auth_repository.create_refresh_token(
+    rotated = await auth_repository.rotate_refresh_token(
         db,
-        user_id=str(user.id),
-        token_hash=hash_refresh_token(new_refresh_token),
+        token_hash=hash_refresh_token(refresh_token),
+        new_token_hash=hash_refresh_token(new_refresh_token),
         expires_at=get_refresh_expiry(),
     )
+    if not rotated:
+        raise ValueError("Invalid refresh token")
     await db.commit()
 
+    user_id, role = rotated
+    access_token = create_access_token(subject=user_id, role=role)
+
     return TokenResponse(
         access_token=access_token,
         access_expires_in=settings.access_ttl_seconds,
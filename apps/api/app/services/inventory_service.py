@@ -0,0 +1,316 @@
+import logging
+import random
+import zlib
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import inventory_cache
+from app.core.config import settings
+from app.core.metrics import (
+    inventory_availability_lookups_total,
+    inventory_drift_corrections_total,
+    inventory_oversold_total,
+    inventory_reservations_total,
+)
+from app.repositories import inventory_repository
+from app.schemas.orders import OrderItemRequest
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 500
+
+
+class InsufficientStock(ValueError):
+    def __init__(self, skus: set[str]) -> None:
+        super().__init__("Insufficient stock")
+        self.skus = sorted(skus)
+
+
+def order_quantities(items: list[OrderItemRequest]) -> dict[str, int]:
+    # One row per SKU: UPDATE ... FROM applies only one of several joined rows to the same target row.
+    quantities: dict[str, int] = {}
+    for item in items:
+        quantities[item.sku] = quantities.get(item.sku, 0) + item.qty
+    return quantities
+
+
+def _fast_path_enabled() -> bool:
+    return settings.inventory_reservation_mode == "redis"
+
+
+def _stripe_pick(pick_key: str, sku: str, attempt: int) -> int:
+    if settings.inventory_stripe_pick == "hash":
+        # Stable per order, so a retried request lands on the same stripes; the attempt moves retries along.
+        return zlib.crc32(f"{pick_key}:{sku}".encode()) + attempt
+    return random.getrandbits(31)
+
+
+async def _reserve_quantities(db: AsyncSession, order_id, quantities: dict[str, int], pick_key: str) -> set[str]:
+    """Reserves what it can in Postgres for the order and returns the SKUs left without enough stock."""
+    missing = dict(quantities)
+    for attempt in range(settings.inventory_reserve_attempts):
+        picks = {sku: _stripe_pick(pick_key, sku, attempt) for sku in missing}
+        reserved = await inventory_repository.reserve_stock(db, order_id, missing, picks)
+        missing = {sku: qty for sku, qty in missing.items() if sku not in reserved}
+        if not missing:
+            return set()
+    # Stock spread too thin for any one stripe is not consolidated here: that would lock every stripe of a hot SKU
+    # inside the order transaction. rebalance_skewed and set_stripes do it in short transactions of their own.
+    return set(missing)
+
+
+async def reserve_for_order(db: AsyncSession, order_id, items: list[OrderItemRequest], pick_key: str) -> None:
+    """Reserves every line item or raises InsufficientStock; the caller's transaction must be rolled back then."""
+    missing = await _reserve_quantities(db, order_id, order_quantities(items), pick_key)
+    inventory_reservations_total.labels(path="db", result="short" if missing else "reserved").inc()
+    if missing:
+        raise InsufficientStock(missing)
+
+
+async def reserve_fast_path(redis: Redis, items: list[OrderItemRequest]) -> dict[str, int] | None:
+    """
+    Redis mode: decides availability for all line items in one Lua call, without touching Postgres.
+    Returns the reserved quantities, to be recorded with record_fast_path in the order's transaction,
+    or None when the order has to reserve in Postgres instead (mode off, cache not loaded, Redis down).
+    """
+    if not _fast_path_enabled():
+        return None
+    quantities = order_quantities(items)
+    try:
+        short = await inventory_cache.reserve_inventory(redis, quantities)
+    except (RedisError, OSError):
+        logger.warning("inventory fast path unavailable, reserving in postgres", exc_info=True)
+        short = None
+    if short is None:
+        inventory_reservations_total.labels(path="redis", result="fallback").inc()
+        return None
+    if short:
+        inventory_reservations_total.labels(path="redis", result="short").inc()
+        raise InsufficientStock(set(short))
+    inventory_reservations_total.labels(path="redis", result="reserved").inc()
+    return quantities
+
+
+async def record_fast_path(db: AsyncSession, order_id, quantities: dict[str, int]) -> None:
+    # Applied to inventory later by the reconciler, when OrderCreated comes back through the outbox and Kafka.
+    await inventory_repository.add_ledger_entries(db, order_id, "reserve", quantities)
+
+
+async def undo_fast_path(redis: Redis, quantities: dict[str, int]) -> None:
+    """Gives a fast-path reservation back when the order's transaction did not commit."""
+    await apply_cache_deltas(redis, {sku: (qty, -qty) for sku, qty in quantities.items()})
+
+
+async def apply_cache_deltas(redis: Redis, deltas: dict[str, tuple[int, int]]) -> None:
+    if not deltas:
+        return
+    try:
+        await inventory_cache.adjust_inventory(redis, deltas)
+    except (RedisError, OSError):
+        # Postgres already has the change; drift correction brings Redis back in line.
+        logger.warning("could not apply inventory change to redis", exc_info=True)
+
+
+async def _settle_for_order(db: AsyncSession, order_id: str, kind: str) -> dict[str, tuple[int, int]]:
+    restock = kind == "release"
+    if not _fast_path_enabled():
+        await inventory_repository.settle_order_stock(db, order_id, restock=restock)
+        return {}
+    if await inventory_repository.add_ledger_entries_for_order(db, order_id, kind):
+        # Redis holds the whole order whatever Postgres ends up applying from the ledger.
+        quantities = await inventory_repository.get_order_quantities(db, order_id)
+    else:
+        quantities = await inventory_repository.settle_order_stock(db, order_id, restock=restock)
+    return {sku: (qty if restock else 0, -qty) for sku, qty in quantities.items()}
+
+
+async def release_for_order(db: AsyncSession, order_id: str) -> dict[str, tuple[int, int]]:
+    """Returns the Redis deltas to apply with apply_cache_deltas once the transaction has committed."""
+    return await _settle_for_order(db, order_id, "release")
+
+
+async def consume_for_order(db: AsyncSession, order_id: str) -> dict[str, tuple[int, int]]:
+    """Returns the Redis deltas to apply with apply_cache_deltas once the transaction has committed."""
+    return await _settle_for_order(db, order_id, "consume")
+
+
+async def apply_ledger(db: AsyncSession, order_id: str, kind: str) -> None:
+    """
+    Reconciler side: applies an order's fast-path ledger entries of `kind` to inventory, at most once.
+    release and consume settle only what the reserve actually took (its inventory_reservations rows), so the
+    SKUs of an oversold reserve are not given back or sold a second time.
+    """
+    quantities = await inventory_repository.mark_ledger_applied(db, order_id, kind)
+    if quantities and kind == "reserve":
+        missing = await _reserve_quantities(db, order_id, quantities, pick_key=order_id)
+        if missing:
+            # Redis let the order through on stock Postgres does not have; the order stands, drift correction follows.
+            # No reservation rows are recorded for these SKUs, so settling the order later leaves them alone.
+            inventory_oversold_total.inc()
+            logger.error("order %s oversold %s", order_id, sorted(missing))
+    elif quantities:
+        await inventory_repository.settle_order_stock(db, order_id, restock=kind == "release")
+    await db.commit()
+
+
+async def rebuild_cache(db: AsyncSession, redis: Redis) -> int:
+    after = None
+    loaded = 0
+    while True:
+        rows = await inventory_repository.list_expected_levels(db, after, REBUILD_BATCH_SIZE)
+        if rows:
+            await inventory_cache.set_inventory_levels(redis, {sku: (available, reserved) for sku, available, reserved in rows})
+            loaded += len(rows)
+        if len(rows) < REBUILD_BATCH_SIZE:
+            break
+        after = rows[-1][0]
+    await inventory_cache.mark_inventory_loaded(redis)
+    return loaded
+
+
+async def ensure_cache_loaded(db: AsyncSession, redis: Redis) -> bool:
+    """
+    Redis mode: rebuilds the Redis stock levels from Postgres after a Redis restart; returns True if this call
+    rebuilt them. In db mode the hashes are a read-through cache with a TTL and nothing is rebuilt.
+    """
+    if not _fast_path_enabled() or await inventory_cache.is_inventory_loaded(redis):
+        return False
+    if not await inventory_cache.acquire_rebuild_lock(redis, ttl_seconds=300):
+        return False
+    try:
+        loaded = await rebuild_cache(db, redis)
+    finally:
+        await inventory_cache.release_rebuild_lock(redis)
+    logger.info("rebuilt redis inventory for %d skus", loaded)
+    return True
+
+
+async def correct_drift(db: AsyncSession, redis: Redis, previous: dict[str, tuple[int, int]]) -> dict[str, tuple[int, int]]:
+    """
+    Compares Redis with Postgres (plus unapplied ledger entries) and returns the drift seen per SKU.
+    In-flight orders make the two differ for a moment, so only drift unchanged since the previous pass is corrected.
+    Redis mode corrects with deltas, as reservations keep landing on the hashes; db mode overwrites the cached
+    hashes with the Postgres levels and a fresh TTL, since a delta could recreate an expired hash without one.
+    """
+    seen: dict[str, tuple[int, int]] = {}
+    after = None
+    while True:
+        rows = await inventory_repository.list_expected_levels(db, after, REBUILD_BATCH_SIZE)
+        cached = await inventory_cache.get_inventory_levels(redis, [sku for sku, _, _ in rows])
+        corrections = {}
+        for sku, available, reserved in rows:
+            current = cached[sku]
+            if current is None:
+                if not _fast_path_enabled():
+                    # Not cached; the next read fills it from Postgres.
+                    continue
+                current = (0, 0)
+            drift = (available - current[0], reserved - current[1])
+            if drift == (0, 0):
+                continue
+            seen[sku] = drift
+            if previous.get(sku) == drift:
+                corrections[sku] = drift if _fast_path_enabled() else (available, reserved)
+        if corrections and await _correct(redis, corrections):
+            inventory_drift_corrections_total.inc(len(corrections))
+            logger.info("corrected redis inventory drift for %d skus", len(corrections))
+        if len(rows) < REBUILD_BATCH_SIZE:
+            return seen
+        after = rows[-1][0]
+
+
+async def _correct(redis: Redis, corrections: dict[str, tuple[int, int]]) -> bool:
+    if _fast_path_enabled():
+        return await inventory_cache.adjust_inventory(redis, corrections)
+    await inventory_cache.set_inventory_levels(redis, corrections, ttl_seconds=settings.inventory_cache_ttl_seconds)
+    return True
+
+
+async def get_availability(db: AsyncSession, redis: Redis, skus: list[str]) -> dict[str, int]:
+    """
+    Available units per SKU from the inv:<sku> hashes in one pipeline; only misses go to Postgres, in one query.
+    Unknown SKUs report 0 and are cached as empty for a short while, so repeated lookups stay off Postgres.
+    """
+    try:
+        cached = await inventory_cache.get_inventory_levels(redis, skus)
+    except (RedisError, OSError):
+        logger.warning("inventory cache unavailable, reading availability from postgres", exc_info=True)
+        cached = {}
+    availability = {sku: levels[0] for sku, levels in cached.items() if levels is not None}
+    inventory_availability_lookups_total.labels(result="hit").inc(len(availability))
+
+    misses = [sku for sku in skus if sku not in availability]
+    if misses:
+        inventory_availability_lookups_total.labels(result="miss").inc(len(misses))
+        levels = await inventory_repository.get_stock_levels(db, misses)
+        availability.update({sku: levels[sku][0] if sku in levels else 0 for sku in misses})
+        if not _fast_path_enabled():
+            # In redis mode the hashes are owned by the fast path and its rebuild; Postgres lags them there.
+            unknown = {sku: (0, 0) for sku in misses if sku not in levels}
+            await _add_to_cache(redis, levels, unknown)
+    return availability
+
+
+async def _add_to_cache(redis: Redis, levels: dict[str, tuple[int, int]], unknown: dict[str, tuple[int, int]]) -> None:
+    # Only where no hash exists: a refresh_cache that ran after our read has the newer value.
+    # Restocking an unknown SKU overwrites its empty entry; seeding leaves it to the short TTL.
+    try:
+        await inventory_cache.add_inventory_levels(redis, levels, ttl_seconds=settings.inventory_cache_ttl_seconds)
+        await inventory_cache.add_inventory_levels(redis, unknown, ttl_seconds=settings.inventory_negative_cache_ttl_seconds)
+    except (RedisError, OSError):
+        logger.warning("could not fill inventory cache", exc_info=True)
+
+
+async def _write_cache(redis: Redis, levels: dict[str, tuple[int, int]]) -> None:
+    try:
+        await inventory_cache.set_inventory_levels(redis, levels, ttl_seconds=settings.inventory_cache_ttl_seconds)
+    except (RedisError, OSError):
+        logger.warning("could not refresh inventory cache", exc_info=True)
+
+
+async def refresh_cache(db: AsyncSession, redis: Redis, skus: list[str]) -> None:
+    """Db mode: overwrites the cached levels of SKUs whose stock just changed with the committed Postgres totals."""
+    if _fast_path_enabled() or not skus:
+        return
+    levels = await inventory_repository.get_stock_levels(db, skus)
+    await _write_cache(redis, levels)
+
+
+async def refresh_cache_for_orders(db: AsyncSession, redis: Redis, order_ids: list[str]) -> None:
+    if _fast_path_enabled() or not order_ids:
+        return
+    await refresh_cache(db, redis, await inventory_repository.list_order_skus(db, order_ids))
+    await db.commit()
+
+
+async def restock(db: AsyncSession, redis: Redis, sku: str, qty: int):
+    await inventory_repository.restock(db, sku, qty)
+    await db.commit()
+    if _fast_path_enabled():
+        await apply_cache_deltas(redis, {sku: (qty, 0)})
+    else:
+        await refresh_cache(db, redis, [sku])
+    return (await inventory_repository.get_inventory(db, [sku]))[0]
+
+
+async def set_stripes(db: AsyncSession, sku: str, stripes: int):
+    """Splits or merges the SKU's stock into `stripes` rows; returns None for an unknown SKU."""
+    if not await inventory_repository.rebalance(db, sku, stripes):
+        return None
+    await db.commit()
+    return (await inventory_repository.get_inventory(db, [sku]))[0]
+
+
+async def rebalance_skewed(db: AsyncSession, min_skew: int, limit: int) -> list[str]:
+    skus = await inventory_repository.list_skewed_skus(db, min_skew, limit)
+    for sku in skus:
+        # One transaction per SKU keeps each all-stripes lock short.
+        await inventory_repository.rebalance(db, sku)
+        await db.commit()
+    return skus
+
+
+async def get_inventory(db: AsyncSession, skus: list[str]):
+    return await inventory_repository.get_inventory(db, skus)
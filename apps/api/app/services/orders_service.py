@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.orders import Order
@@ -6,6 +7,7 @@ from app.db.order_items import OrderItem
 from app.db.outbox_events import OutboxEvent
 from app.schemas.orders import OrderItemRequest
 from app.repositories import orders_repository, outbox_repository
+from app.services import inventory_service
 
 
 def calculate_total(items: list[OrderItemRequest]) -> int:
@@ -21,11 +23,28 @@ def make_cursor(created_at: datetime, order_id: str) -> str:
     return f"{created_at.isoformat()}|{order_id}"
 
 
-async def create_order_with_outbox(db: AsyncSession, user_id: str, idempotency_key: str, currency: str, items: list[OrderItemRequest]) -> Order:
+async def create_order_with_outbox(
+    db: AsyncSession, redis: Redis, user_id: str, idempotency_key: str, currency: str, items: list[OrderItemRequest]
+) -> Order:
     existing = await orders_repository.get_order_by_idempotency(db, user_id=user_id, idempotency_key=idempotency_key)
     if existing:
         raise ValueError("Idempotency conflict")
 
+    fast_path = await inventory_service.reserve_fast_path(redis, items)
+    try:
+        order = await _insert_order(db, user_id, idempotency_key, currency, items, fast_path)
+    except Exception:
+        if fast_path:
+            await inventory_service.undo_fast_path(redis, fast_path)
+        raise
+    await db.refresh(order)
+
+    return order
+
+
+async def _insert_order(
+    db: AsyncSession, user_id: str, idempotency_key: str, currency: str, items: list[OrderItemRequest], fast_path: dict[str, int] | None
+) -> Order:
     total = calculate_total(items)
 
     order = Order(
@@ -71,9 +90,18 @@ async def create_order_with_outbox(db: AsyncSession, user_id: str, idempotency_k
 
     await orders_repository.add_order_items(db, order_items)
     await outbox_repository.add_outbox_event(db, outbox)
-    await db.commit()
-    await db.refresh(order)
 
+    if fast_path:
+        await inventory_service.record_fast_path(db, order.id, fast_path)
+    else:
+        # The reserving UPDATE takes no lock up front, but the rows it writes stay locked until COMMIT;
+        # reserving last keeps that down to the statement itself plus the commit round trip.
+        try:
+            await inventory_service.reserve_for_order(db, order.id, items, pick_key=idempotency_key)
+        except inventory_service.InsufficientStock:
+            await db.rollback()
+            raise
+    await db.commit()
     return order
 
 
@@ -104,6 +132,7 @@ async def get_order_detail(db: AsyncSession, user_id: str, order_id: str) -> Ord
 
 async def update_order_status(
     db: AsyncSession,
+    redis: Redis,
     user_id: str,
     order_id: str,
     new_status: str,
@@ -115,7 +144,10 @@ async def update_order_status(
     if order.status != "created" or new_status not in ("paid", "canceled"):
         raise ValueError("Invalid transition")
 
-    await orders_repository.update_order_status(db, order_id, new_status)
+    if not await orders_repository.update_order_status(db, order_id, new_status, from_status="created"):
+        # A concurrent request moved the order first; settling its stock again would double count.
+        await db.rollback()
+        raise ValueError("Invalid transition")
 
     outbox = OutboxEvent(
         aggregate_type="order",
@@ -126,7 +158,13 @@ async def update_order_status(
     )
     await outbox_repository.add_outbox_event(db, outbox)
 
+    if new_status == "canceled":
+        cache_deltas = await inventory_service.release_for_order(db, order_id)
+    else:
+        cache_deltas = await inventory_service.consume_for_order(db, order_id)
+
     await db.commit()
+    await inventory_service.apply_cache_deltas(redis, cache_deltas)
     await db.refresh(order)
     return order
 
@@ -0,0 +1,63 @@
+from app.cache import inventory_cache
+from app.services import inventory_service
+
+
+async def test_miss_is_read_from_postgres_and_cached_with_a_ttl(db, redis):
+    await inventory_service.restock(db, redis, "SKU-A", 7)
+    await redis.delete(inventory_cache.inventory_key("SKU-A"))
+
+    assert await inventory_service.get_availability(db, redis, ["SKU-A"]) == {"SKU-A": 7}
+
+    assert await inventory_cache.get_inventory_levels(redis, ["SKU-A"]) == {"SKU-A": (7, 0)}
+    assert 0 < await redis.ttl(inventory_cache.inventory_key("SKU-A")) <= 300
+
+
+async def test_hit_does_not_touch_postgres(db, redis):
+    await inventory_cache.set_inventory_levels(redis, {"SKU-A": (4, 1)})
+
+    # Postgres has no row for SKU-A, so only the cache can answer 4.
+    assert await inventory_service.get_availability(db, redis, ["SKU-A"]) == {"SKU-A": 4}
+
+
+async def test_unknown_skus_report_zero_and_are_cached_briefly(db, redis):
+    assert await inventory_service.get_availability(db, redis, ["SKU-NONE"]) == {"SKU-NONE": 0}
+
+    assert await inventory_cache.get_inventory_levels(redis, ["SKU-NONE"]) == {"SKU-NONE": (0, 0)}
+    assert 0 < await redis.ttl(inventory_cache.inventory_key("SKU-NONE")) <= 30
+
+
+async def test_restocking_an_unknown_sku_replaces_its_empty_entry(db, redis):
+    await inventory_service.get_availability(db, redis, ["SKU-NEW"])
+
+    await inventory_service.restock(db, redis, "SKU-NEW", 3)
+
+    assert await inventory_service.get_availability(db, redis, ["SKU-NEW"]) == {"SKU-NEW": 3}
+
+
+async def test_read_through_never_overwrites_a_newer_value(redis):
+    await inventory_cache.set_inventory_levels(redis, {"SKU-A": (2, 3)})
+
+    added = await inventory_cache.add_inventory_levels(redis, {"SKU-A": (9, 0), "SKU-B": (1, 0)}, ttl_seconds=60)
+
+    assert added == 1
+    assert await inventory_cache.get_inventory_levels(redis, ["SKU-A", "SKU-B"]) == {"SKU-A": (2, 3), "SKU-B": (1, 0)}
+
+
+async def test_redis_mode_leaves_the_hashes_to_the_fast_path(db, redis, redis_mode):
+    await inventory_service.restock(db, redis, "SKU-A", 7)
+
+    assert await inventory_service.get_availability(db, redis, ["SKU-A"]) == {"SKU-A": 7}
+
+    assert not await redis.exists(inventory_cache.inventory_key("SKU-A"))
+
+
+async def test_db_mode_drift_is_overwritten_with_a_ttl(db, redis):
+    await inventory_service.restock(db, redis, "SKU-A", 7)
+    await inventory_cache.set_inventory_levels(redis, {"SKU-A": (5, 0)})
+
+    drift = await inventory_service.correct_drift(db, redis, {})
+    assert await inventory_service.correct_drift(db, redis, drift) == {"SKU-A": (2, 0)}
+
+    assert await inventory_cache.get_inventory_levels(redis, ["SKU-A"]) == {"SKU-A": (7, 0)}
+    assert 0 < await redis.ttl(inventory_cache.inventory_key("SKU-A")) <= 300
+    assert not await inventory_service.ensure_cache_loaded(db, redis)
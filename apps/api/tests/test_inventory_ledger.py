@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.cache import inventory_cache
+from app.repositories import inventory_repository, orders_repository
+from app.services import inventory_service
+from app.services.inventory_service import InsufficientStock
+
+from tests.conftest import order_items, reservations, stock
+
+
+@pytest.fixture
+async def loaded_cache(db, redis, redis_mode):
+    await inventory_service.ensure_cache_loaded(db, redis)
+
+
+async def _fast_path_order(db, redis, make_order, quantities: dict[str, int]):
+    reserved = await inventory_service.reserve_fast_path(redis, order_items(quantities))
+    order_id = await make_order(quantities)
+    await inventory_service.record_fast_path(db, order_id, reserved)
+    await db.commit()
+    return order_id
+
+
+async def _transition(db, order_id, new_status: str) -> None:
+    # What orders_service.update_order_status does to inventory, without the outbox.
+    assert await orders_repository.update_order_status(db, str(order_id), new_status, from_status="created")
+    if new_status == "canceled":
+        await inventory_service.release_for_order(db, str(order_id))
+    else:
+        await inventory_service.consume_for_order(db, str(order_id))
+    await db.commit()
+
+
+async def test_fast_path_reserves_in_redis_only(db, redis, loaded_cache, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+
+    order_id = await _fast_path_order(db, redis, make_order, {"SKU-A": 2})
+
+    assert await inventory_cache.get_inventory_levels(redis, ["SKU-A"]) == {"SKU-A": (3, 2)}
+    assert await stock(db, "SKU-A") == [(0, 5, 0)]
+    assert await reservations(db, order_id) == []
+
+
+async def test_fast_path_rejects_short_orders_without_reserving(db, redis, loaded_cache):
+    await inventory_service.restock(db, redis, "SKU-A", 1)
+
+    with pytest.raises(InsufficientStock):
+        await inventory_service.reserve_fast_path(redis, order_items({"SKU-A": 2}))
+
+    assert await inventory_cache.get_inventory_levels(redis, ["SKU-A"]) == {"SKU-A": (1, 0)}
+
+
+async def test_ledger_is_applied_once(db, redis, loaded_cache, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    order_id = await _fast_path_order(db, redis, make_order, {"SKU-A": 2})
+
+    for _ in range(2):
+        await inventory_service.apply_ledger(db, str(order_id), "reserve")
+
+    assert await stock(db, "SKU-A") == [(0, 3, 2)]
+    assert await reservations(db, order_id) == [("SKU-A", 0, 2)]
+
+
+@pytest.mark.parametrize(("new_status", "kind", "expected"), [("canceled", "release", (0, 5, 0)), ("paid", "consume", (0, 3, 0))])
+async def test_settlement_goes_through_the_ledger(db, redis, loaded_cache, make_order, new_status, kind, expected):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    order_id = await _fast_path_order(db, redis, make_order, {"SKU-A": 2})
+    await inventory_service.apply_ledger(db, str(order_id), "reserve")
+
+    await _transition(db, order_id, new_status)
+    assert await stock(db, "SKU-A") == [(0, 3, 2)]
+
+    await inventory_service.apply_ledger(db, str(order_id), kind)
+    assert await stock(db, "SKU-A") == [expected]
+
+
+async def test_expected_levels_include_unapplied_entries(db, redis, loaded_cache, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    await _fast_path_order(db, redis, make_order, {"SKU-A": 2})
+
+    assert await inventory_repository.list_expected_levels(db, None, 10) == [("SKU-A", 3, 2)]
+    assert await inventory_service.correct_drift(db, redis, {}) == {}
+
+
+async def test_oversold_reserve_is_not_settled_later(db, redis, redis_mode, make_order):
+    # Redis let the order through, Postgres only has one unit left.
+    await inventory_service.restock(db, redis, "SKU-A", 1)
+    order_id = await make_order({"SKU-A": 2})
+    await inventory_service.record_fast_path(db, order_id, {"SKU-A": 2})
+    await db.commit()
+
+    await inventory_service.apply_ledger(db, str(order_id), "reserve")
+    assert await stock(db, "SKU-A") == [(0, 1, 0)]
+    assert await reservations(db, order_id) == []
+
+    await _transition(db, order_id, "canceled")
+    await inventory_service.apply_ledger(db, str(order_id), "release")
+    assert await stock(db, "SKU-A") == [(0, 1, 0)]
+
+
+async def test_purge_keeps_entries_of_open_orders(db, redis, loaded_cache, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    open_order = await _fast_path_order(db, redis, make_order, {"SKU-A": 1})
+    paid_order = await _fast_path_order(db, redis, make_order, {"SKU-A": 1})
+    for order_id in (open_order, paid_order):
+        await inventory_service.apply_ledger(db, str(order_id), "reserve")
+    await _transition(db, paid_order, "paid")
+    await inventory_service.apply_ledger(db, str(paid_order), "consume")
+
+    applied_before = datetime.now(timezone.utc) + timedelta(seconds=1)
+    deleted = await inventory_repository.delete_applied_ledger_entries(db, applied_before, None, 100)
+    await db.commit()
+
+    assert len(deleted) == 2
+    result = await db.execute(text("SELECT order_id, kind FROM inventory_ledger"))
+    assert [tuple(row) for row in result.all()] == [(open_order, "reserve")]
@@ -0,0 +1,137 @@
+import pytest
+
+from app.repositories import inventory_repository
+from app.services import inventory_service
+from app.services.inventory_service import InsufficientStock
+
+from tests.conftest import order_items, reservations, stock
+
+
+async def test_reserve_is_all_or_nothing(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    await inventory_service.restock(db, redis, "SKU-B", 1)
+    order_id = await make_order({"SKU-A": 2, "SKU-B": 3})
+
+    with pytest.raises(InsufficientStock) as exc:
+        await inventory_service.reserve_for_order(db, order_id, order_items({"SKU-A": 2, "SKU-B": 3}), pick_key="k")
+    await db.rollback()
+
+    assert exc.value.skus == ["SKU-B"]
+    assert await stock(db, "SKU-A") == [(0, 5, 0)]
+    assert await reservations(db, order_id) == []
+
+
+async def test_reserve_records_what_the_order_holds(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    order_id = await make_order({"SKU-A": 2})
+
+    await inventory_service.reserve_for_order(db, order_id, order_items({"SKU-A": 2}), pick_key="k")
+    await db.commit()
+
+    assert await stock(db, "SKU-A") == [(0, 3, 2)]
+    assert await reservations(db, order_id) == [("SKU-A", 0, 2)]
+
+
+@pytest.mark.parametrize(("kind", "expected"), [("release", (0, 5, 0)), ("consume", (0, 3, 0))])
+async def test_settle_clears_the_recorded_reservation(db, redis, make_order, kind, expected):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    order_id = await make_order({"SKU-A": 2})
+    await inventory_service.reserve_for_order(db, order_id, order_items({"SKU-A": 2}), pick_key="k")
+    await db.commit()
+
+    settled = await inventory_repository.settle_order_stock(db, str(order_id), restock=kind == "release")
+    await db.commit()
+
+    assert settled == {"SKU-A": 2}
+    assert await stock(db, "SKU-A") == [expected]
+    assert await reservations(db, order_id) == []
+
+
+async def test_settling_an_order_without_reservation_is_a_no_op(db, redis, make_order):
+    # Orders created before inventory was tracked never reserved anything.
+    order_id = await make_order({"SKU-A": 2})
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+
+    await inventory_service.release_for_order(db, str(order_id))
+    await db.commit()
+
+    assert await stock(db, "SKU-A") == [(0, 5, 0)]
+
+
+async def test_settling_twice_settles_once(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 5)
+    order_id = await make_order({"SKU-A": 2})
+    await inventory_service.reserve_for_order(db, order_id, order_items({"SKU-A": 2}), pick_key="k")
+    await db.commit()
+
+    for _ in range(2):
+        await inventory_repository.settle_order_stock(db, str(order_id), restock=True)
+        await db.commit()
+
+    assert await stock(db, "SKU-A") == [(0, 5, 0)]
+
+
+async def test_reserve_falls_back_to_the_next_stripe(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 10)
+    await inventory_service.set_stripes(db, "SKU-A", 2)
+    first = await make_order({"SKU-A": 5})
+    second = await make_order({"SKU-A": 5})
+
+    assert await inventory_repository.reserve_stock(db, first, {"SKU-A": 5}, {"SKU-A": 0}) == {"SKU-A"}
+    assert await inventory_repository.reserve_stock(db, second, {"SKU-A": 5}, {"SKU-A": 0}) == {"SKU-A"}
+    await db.commit()
+
+    assert await reservations(db, first) == [("SKU-A", 0, 5)]
+    assert await reservations(db, second) == [("SKU-A", 1, 5)]
+    assert await stock(db, "SKU-A") == [(0, 0, 5), (1, 0, 5)]
+
+
+async def test_thin_stripes_are_not_consolidated_inside_the_order(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 6)
+    await inventory_service.set_stripes(db, "SKU-A", 2)
+    order_id = await make_order({"SKU-A": 5})
+
+    with pytest.raises(InsufficientStock):
+        await inventory_service.reserve_for_order(db, order_id, order_items({"SKU-A": 5}), pick_key="k")
+    await db.rollback()
+
+    assert await stock(db, "SKU-A") == [(0, 3, 0), (1, 3, 0)]
+
+
+async def test_dropping_stripes_moves_their_reservations(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 10)
+    await inventory_service.set_stripes(db, "SKU-A", 2)
+    order_id = await make_order({"SKU-A": 2})
+    await inventory_repository.reserve_stock(db, order_id, {"SKU-A": 2}, {"SKU-A": 1})
+    await db.commit()
+
+    await inventory_service.set_stripes(db, "SKU-A", 1)
+    assert await stock(db, "SKU-A") == [(0, 8, 2)]
+    assert await reservations(db, order_id) == [("SKU-A", 0, 2)]
+
+    await inventory_service.release_for_order(db, str(order_id))
+    await db.commit()
+    assert await stock(db, "SKU-A") == [(0, 10, 0)]
+
+
+async def test_rebalance_spreads_available_and_leaves_reserved_in_place(db, redis, make_order):
+    await inventory_service.restock(db, redis, "SKU-A", 10)
+    await inventory_service.set_stripes(db, "SKU-A", 2)
+    order_id = await make_order({"SKU-A": 4})
+    await inventory_repository.reserve_stock(db, order_id, {"SKU-A": 4}, {"SKU-A": 0})
+    await db.commit()
+
+    assert await inventory_service.rebalance_skewed(db, min_skew=0, limit=10) == ["SKU-A"]
+
+    assert await stock(db, "SKU-A") == [(0, 3, 4), (1, 3, 0)]
+
+
+async def test_seed_stock_only_adds_untracked_skus(db, redis, make_order):
+    await make_order({"SKU-A": 1, "SKU-B": 1})
+    await inventory_service.restock(db, redis, "SKU-A", 2)
+
+    assert await inventory_repository.seed_stock(db, 50, None) == 1
+    await db.commit()
+
+    assert await stock(db, "SKU-A") == [(0, 2, 0)]
+    assert await stock(db, "SKU-B") == [(0, 50, 0)]
@@ -0,0 +1,58 @@
+import fakeredis
+import pytest
+
+from app.cache import inventory_cache
+
+
+@pytest.fixture
+async def fake_redis():
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def loaded(fake_redis):
+    await inventory_cache.mark_inventory_loaded(fake_redis)
+
+
+async def test_reserve_defers_to_postgres_until_loaded(fake_redis):
+    await inventory_cache.set_inventory_levels(fake_redis, {"SKU-A": (5, 0)})
+
+    assert await inventory_cache.reserve_inventory(fake_redis, {"SKU-A": 1}) is None
+    assert await inventory_cache.get_inventory_levels(fake_redis, ["SKU-A"]) == {"SKU-A": (5, 0)}
+
+
+async def test_reserve_is_all_or_nothing(fake_redis, loaded):
+    await inventory_cache.set_inventory_levels(fake_redis, {"SKU-A": (5, 0), "SKU-B": (1, 0)})
+
+    assert await inventory_cache.reserve_inventory(fake_redis, {"SKU-A": 2, "SKU-B": 3, "SKU-C": 1}) == ["SKU-B", "SKU-C"]
+    assert await inventory_cache.get_inventory_levels(fake_redis, ["SKU-A", "SKU-B"]) == {"SKU-A": (5, 0), "SKU-B": (1, 0)}
+
+    assert await inventory_cache.reserve_inventory(fake_redis, {"SKU-A": 2, "SKU-B": 1}) == []
+    assert await inventory_cache.get_inventory_levels(fake_redis, ["SKU-A", "SKU-B"]) == {"SKU-A": (3, 2), "SKU-B": (0, 1)}
+
+
+async def test_adjust_is_a_no_op_until_loaded(fake_redis):
+    assert not await inventory_cache.adjust_inventory(fake_redis, {"SKU-A": (2, -1)})
+
+    assert not await fake_redis.exists(inventory_cache.inventory_key("SKU-A"))
+
+
+async def test_adjust_applies_deltas(fake_redis, loaded):
+    await inventory_cache.set_inventory_levels(fake_redis, {"SKU-A": (3, 2)})
+
+    assert await inventory_cache.adjust_inventory(fake_redis, {"SKU-A": (2, -2), "SKU-B": (4, 0)})
+
+    assert await inventory_cache.get_inventory_levels(fake_redis, ["SKU-A", "SKU-B"]) == {"SKU-A": (5, 0), "SKU-B": (4, 0)}
+
+
+async def test_add_writes_only_missing_hashes_with_a_ttl(fake_redis):
+    await inventory_cache.set_inventory_levels(fake_redis, {"SKU-A": (2, 3)})
+
+    added = await inventory_cache.add_inventory_levels(fake_redis, {"SKU-A": (9, 0), "SKU-B": (1, 0)}, ttl_seconds=60)
+
+    assert added == 1
+    assert await inventory_cache.get_inventory_levels(fake_redis, ["SKU-A", "SKU-B"]) == {"SKU-A": (2, 3), "SKU-B": (1, 0)}
+    assert await fake_redis.ttl(inventory_cache.inventory_key("SKU-A")) == -1
+    assert 0 < await fake_redis.ttl(inventory_cache.inventory_key("SKU-B")) <= 60
@@ -0,0 +1,44 @@
+import fakeredis
+import pytest
+
+from app.cache.rate_limit import hit_rate_limit, parse_rate_limit, rate_limit_key
+
+
+@pytest.fixture
+async def fake_redis():
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.mark.parametrize(("spec", "expected"), [("5/60", (5, 60.0)), ("300/60", (300, 60.0)), ("10/0.5", (10, 0.5))])
+def test_parse_rate_limit(spec, expected):
+    assert parse_rate_limit(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["5", "five/60", "5/minute"])
+def test_parse_rate_limit_rejects_malformed_specs(spec):
+    with pytest.raises(ValueError):
+        parse_rate_limit(spec)
+
+
+async def test_bucket_allows_up_to_the_limit_then_asks_to_retry(fake_redis):
+    results = [await hit_rate_limit(fake_redis, "login", "1.2.3.4", limit=3, period_seconds=60) for _ in range(4)]
+
+    assert results[:3] == [None, None, None]
+    assert 1 <= results[3] <= 20
+    assert 0 < await fake_redis.pttl(rate_limit_key("login", "1.2.3.4")) <= 61_000
+
+
+async def test_buckets_are_per_subject(fake_redis):
+    assert await hit_rate_limit(fake_redis, "login", "a", limit=1, period_seconds=60) is None
+    assert await hit_rate_limit(fake_redis, "login", "b", limit=1, period_seconds=60) is None
+    assert await hit_rate_limit(fake_redis, "login", "a", limit=1, period_seconds=60) is not None
+
+
+async def test_fails_open_when_redis_is_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    assert await hit_rate_limit(client, "login", "a", limit=1, period_seconds=60) is None
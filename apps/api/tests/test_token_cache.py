@@ -0,0 +1,61 @@
+import time
+
+from app.security.jwt import VerifiedTokenCache
+
+
+def _claims(ttl: float = 60) -> dict:
+    return {"sub": "user-1", "role": "user", "exp": time.time() + ttl}
+
+
+def test_claims_are_copied_in_and_out():
+    cache = VerifiedTokenCache(max_entries=10)
+    claims = _claims()
+    cache.put("token", claims)
+
+    claims["role"] = "admin"
+    cached = cache.get("token")
+    cached["role"] = "admin"
+
+    assert cache.get("token")["role"] == "user"
+
+
+def test_expired_claims_are_dropped():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("token", _claims(ttl=-1))
+
+    assert cache.get("token") is None
+    assert len(cache._entries) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_entries=2)
+    cache.put("a", _claims())
+    cache.put("b", _claims())
+    cache.get("a")
+
+    cache.put("c", _claims())
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_claims_without_exp_and_disabled_cache_store_nothing():
+    claims = _claims()
+    del claims["exp"]
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("token", claims)
+    disabled = VerifiedTokenCache(max_entries=0)
+    disabled.put("token", _claims())
+
+    assert cache.get("token") is None
+    assert disabled.get("token") is None
+
+
+def test_discard_forgets_the_token():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("token", _claims())
+
+    cache.discard("token")
+
+    assert cache.get("token") is None
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from app.config import settings
+
+NAMESPACE_EXISTS = 48
+
+
+def _occurred_at(payload: dict) -> datetime:
+    try:
+        occurred_at = datetime.fromisoformat(payload["occurred_at"].replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return datetime.now(timezone.utc)
+    return occurred_at if occurred_at.tzinfo else occurred_at.replace(tzinfo=timezone.utc)
+
+
+def prepare_audit_collection(db: Database, name: str) -> Collection:
+    """
+    Creates the order_events collection and indexes for the configured AUDIT_STORAGE_MODE:
+    - documents:  one document per event (default), TTL on the event time
+    - timeseries: MongoDB time-series collection bucketed by order_id, expireAfterSeconds retention
+    - buckets:    one document per order with an events array, TTL on the last event
+    """
+    retention_seconds = settings.audit_retention_days * 86400
+
+    if settings.audit_storage_mode == "timeseries":
+        return _prepare_timeseries_collection(db, name, retention_seconds)
+
+    collection = db[name]
+    if settings.audit_storage_mode == "buckets":
+        collection.create_index("order_id", unique=True)
+        ttl_field = "updated_at"
+    else:
+        collection.create_index([("order_id", 1), ("occurred_at", 1)])
+        ttl_field = "ts"
+    if retention_seconds:
+        collection.create_index(ttl_field, expireAfterSeconds=retention_seconds)
+    return collection
+
+
+def _prepare_timeseries_collection(db: Database, name: str, retention_seconds: int) -> Collection:
+    info = next(db.list_collections(filter={"name": name}), None)
+    if info is None:
+        options: dict = {"timeseries": {"timeField": "ts", "metaField": "order_id", "granularity": "minutes"}}
+        if retention_seconds:
+            options["expireAfterSeconds"] = retention_seconds
+        try:
+            db.create_collection(name, **options)
+        except (CollectionInvalid, OperationFailure) as exc:
+            # Another supervisor worker created it first; anything else is a real error.
+            if isinstance(exc, OperationFailure) and exc.code != NAMESPACE_EXISTS:
+                raise
+            info = next(db.list_collections(filter={"name": name}), None)
+
+    if info is not None:
+        if info.get("type") != "timeseries":
+            raise RuntimeError(
+                f"collection {name!r} exists but is not a time-series collection; AUDIT_STORAGE_MODE=timeseries "
+                f"needs a new one (set MONGO_AUDIT_COLLECTION to another name or migrate and drop {name!r})"
+            )
+        if retention_seconds and info.get("options", {}).get("expireAfterSeconds") != retention_seconds:
+            db.command("collMod", name, expireAfterSeconds=retention_seconds)
+
+    collection = db[name]
+    # Created automatically only on MongoDB 6.3+; explicit so older servers get it too (a no-op where it exists).
+    collection.create_index([("order_id", 1), ("ts", 1)])
+    return collection
+
+
+def write_audit_events(collection: Collection, payloads: list[dict]) -> None:
+    if settings.audit_storage_mode == "buckets":
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"order_id": payload["order_id"]},
+                {
+                    # $addToSet keeps redelivered events from being appended twice.
+                    "$addToSet": {
+                        "events": {"event_type": payload["event_type"], "occurred_at": payload["occurred_at"], "data": payload["data"]}
+                    },
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            )
+            for payload in payloads
+        ]
+        collection.bulk_write(operations, ordered=False)
+        return
+
+    collection.insert_many([{**payload, "ts": _occurred_at(payload)} for payload in payloads], ordered=False)
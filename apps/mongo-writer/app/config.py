@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,9 +14,31 @@ class Settings(BaseSettings):
     mongo_url: str
     mongo_db: str = "app"
     mongo_collection: str = "sku_stats"
+    mongo_hourly_collection: str = "sku_stats_hourly"
+    mongo_daily_collection: str = "sku_stats_daily"
     mongo_audit_collection: str = "order_events"
+    mongo_max_pool_size: int = 10
+    audit_storage_mode: Literal["documents", "timeseries", "buckets"] = "documents"
+    audit_retention_days: int = 0  # 0 keeps audit events forever
 
     poll_timeout_seconds: float = 1.0
+    batch_size: int = 500
+    stats_flush_interval_seconds: float = 2.0
+    stats_flush_max_keys: int = 5000
+
+    # Prometheus endpoint; supervisor workers listen on metrics_port + 1, + 2, ... (0 disables).
+    metrics_port: int = 9108
+    lag_refresh_interval_seconds: float = 15.0  # librdkafka statistics.interval.ms for the lag gauge; 0 disables
+
+    # Supervisor mode (mongo-writer-supervisor): one consumer process per worker, per topic.
+    stats_workers: int = 1
+    audit_workers: int = 1
+    worker_shutdown_timeout_seconds: float = 30.0
+    # Crashed workers restart after base * 2^n seconds, capped at the max; a worker that stayed up for the max
+    # delay counts as healthy again. After worker_max_restarts crashes in a row it is given up (0: never).
+    worker_restart_backoff_seconds: float = 1.0
+    worker_restart_backoff_max_seconds: float = 60.0
+    worker_max_restarts: int = 10
 
 
 settings = Settings()  # type: ignore[call-arg]
@@ -6,13 +6,19 @@ import signal
 import sys
 from datetime import datetime, timezone
 
-from confluent_kafka import Consumer, KafkaException
+from confluent_kafka import Consumer, KafkaError, KafkaException
+from prometheus_client import start_http_server
 from pymongo import MongoClient, UpdateOne
 
+from app.audit_store import prepare_audit_collection, write_audit_events
 from app.config import settings
+from app.metrics import consumer_lag, messages_consumed_total, mongo_write_seconds, parse_failures_total
+from app.stats_buffer import StatsBuffer
 
 logger = logging.getLogger("mongo-writer")
 
+STATS_RESOLUTIONS = ("minute", "hour", "day")
+
 
 def _setup_logging() -> None:
     logging.basicConfig(
@@ -26,6 +32,7 @@ def _parse_stats_message(raw: str) -> dict | None:
         data = json.loads(raw)
     except json.JSONDecodeError:
         logger.warning("invalid json payload, skipping")
+        parse_failures_total.labels(topic=settings.kafka_topic, reason="invalid_json").inc()
         return None
 
     sku = data.get("sku")
@@ -34,14 +41,25 @@ def _parse_stats_message(raw: str) -> dict | None:
     total_qty = data.get("total_qty")
     if not sku or not window_start or not window_end or total_qty is None:
         logger.warning("missing required fields, skipping: %s", data)
+        parse_failures_total.labels(topic=settings.kafka_topic, reason="missing_fields").inc()
         return None
 
-    return {
+    resolution = data.get("resolution") or "minute"
+    if resolution not in STATS_RESOLUTIONS:
+        logger.warning("unknown stats resolution, skipping: %s", data)
+        parse_failures_total.labels(topic=settings.kafka_topic, reason="unknown_resolution").inc()
+        return None
+
+    stats = {
         "sku": sku,
+        "resolution": resolution,
         "window_start": window_start,
         "window_end": window_end,
         "total_qty": total_qty,
     }
+    if isinstance(data.get("revenue"), dict):
+        stats["revenue"] = data["revenue"]
+    return stats
 
 
 def _parse_audit_message(raw: str) -> dict | None:
@@ -49,6 +67,7 @@ def _parse_audit_message(raw: str) -> dict | None:
         data = json.loads(raw)
     except json.JSONDecodeError:
         logger.warning("invalid audit json payload, skipping")
+        parse_failures_total.labels(topic=settings.kafka_audit_topic, reason="invalid_json").inc()
         return None
 
     event_type = data.get("event_type")
@@ -71,6 +90,7 @@ def _parse_audit_message(raw: str) -> dict | None:
 
     if not event_type or not order_id:
         logger.warning("missing audit fields, skipping: %s", data)
+        parse_failures_total.labels(topic=settings.kafka_audit_topic, reason="missing_fields").inc()
         return None
 
     return {
@@ -81,28 +101,124 @@ def _parse_audit_message(raw: str) -> dict | None:
     }
 
 
-def _ensure_indexes(stats_collection, audit_collection) -> None:
-    stats_collection.create_index([("sku", 1), ("window_start", 1)], unique=True)
-    audit_collection.create_index([("order_id", 1), ("occurred_at", 1)])
+def _ensure_indexes(stats_collections: dict) -> None:
+    for stats_collection in stats_collections.values():
+        stats_collection.create_index([("sku", 1), ("window_start", 1)], unique=True)
+        # Time-range scans across all SKUs (/stats/sku sort + pagination, top-N $group) without a collection scan.
+        stats_collection.create_index([("window_start", 1), ("sku", 1), ("total_qty", 1)])
 
 
-def main() -> None:
-    _setup_logging()
+def _stats_upsert(payload: dict, now: str) -> UpdateOne:
+    key = {"sku": payload["sku"], "window_start": payload["window_start"]}
+    fields = {
+        "window_end": payload["window_end"],
+        "total_qty": payload["total_qty"],
+        "updated_at": now,
+    }
+    if "revenue" in payload:
+        fields["revenue"] = payload["revenue"]
+    update = {
+        "$set": fields,
+        "$setOnInsert": {"created_at": now},
+    }
+    return UpdateOne(key, update, upsert=True)
+
+
+# Unordered writes: the server applies the whole batch even if one document fails, instead of stopping at it.
+def _write_stats(stats_collections: dict, payloads: list[dict]) -> None:
+    if not payloads:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    by_resolution: dict[str, list[UpdateOne]] = {}
+    for payload in payloads:
+        by_resolution.setdefault(payload["resolution"], []).append(_stats_upsert(payload, now))
+    for resolution, operations in by_resolution.items():
+        stats_collection = stats_collections[resolution]
+        with mongo_write_seconds.labels(collection=stats_collection.name).time():
+            stats_collection.bulk_write(operations, ordered=False)
+
+
+def _write_audit(audit_collection, payloads: list[dict]) -> None:
+    if payloads:
+        with mongo_write_seconds.labels(collection=audit_collection.name).time():
+            write_audit_events(audit_collection, payloads)
+
+
+def _commit(consumer: Consumer) -> None:
+    try:
+        consumer.commit(asynchronous=False)
+    except KafkaException as ex:
+        if ex.args[0].code() != KafkaError._NO_OFFSET:
+            raise
 
-    mongo = MongoClient(settings.mongo_url)
-    stats_collection = mongo[settings.mongo_db][settings.mongo_collection]
-    audit_collection = mongo[settings.mongo_db][settings.mongo_audit_collection]
-    _ensure_indexes(stats_collection, audit_collection)
+
+def _on_stats(stats_json: str) -> None:
+    """
+    stats_cb: librdkafka reports per-partition consumer_lag (high watermark minus committed offset) every
+    statistics.interval.ms from inside consume(), so lag tracking costs no broker round trips of its own.
+    """
+    try:
+        stats = json.loads(stats_json)
+    except json.JSONDecodeError:
+        return
+    for topic, topic_stats in stats.get("topics", {}).items():
+        for partition, partition_stats in topic_stats.get("partitions", {}).items():
+            lag = partition_stats.get("consumer_lag", -1)
+            # -1: internal UA partition, or a partition not assigned to this member / without a committed offset yet.
+            if partition == "-1" or lag < 0:
+                continue
+            consumer_lag.labels(topic=topic, partition=partition).set(lag)
+
+
+def run_consumer(topics: list[str], name: str = "mongo-writer", metrics_port: int = 0) -> None:
+    if metrics_port:
+        start_http_server(metrics_port)
+
+    mongo = MongoClient(settings.mongo_url, maxPoolSize=settings.mongo_max_pool_size)
+    stats_collections = {
+        "minute": mongo[settings.mongo_db][settings.mongo_collection],
+        "hour": mongo[settings.mongo_db][settings.mongo_hourly_collection],
+        "day": mongo[settings.mongo_db][settings.mongo_daily_collection],
+    }
+    audit_collection = prepare_audit_collection(mongo[settings.mongo_db], settings.mongo_audit_collection)
+    _ensure_indexes(stats_collections)
 
     consumer = Consumer(
         {
             "bootstrap.servers": settings.kafka_bootstrap_servers,
             "group.id": settings.kafka_group_id,
+            "client.id": name,
             "auto.offset.reset": "earliest",
-            "enable.auto.commit": True,
+            # Offsets are committed only after everything consumed is durably written (at-least-once).
+            "enable.auto.commit": False,
+            "statistics.interval.ms": int(settings.lag_refresh_interval_seconds * 1000),
+            "stats_cb": _on_stats,
         }
     )
-    consumer.subscribe([settings.kafka_topic, settings.kafka_audit_topic])
+    stats_buffer = StatsBuffer(settings.stats_flush_max_keys, settings.stats_flush_interval_seconds)
+    crashed = False
+
+    def _flush() -> None:
+        # After a failed write the consumed offsets must not be committed; the batch is replayed instead.
+        if crashed:
+            return
+        _write_stats(stats_collections, stats_buffer.drain())
+        _commit(consumer)
+
+    def _on_assign(_consumer, partitions) -> None:
+        logger.info("%s assigned %s", name, [(p.topic, p.partition) for p in partitions])
+
+    def _on_revoke(_consumer, partitions) -> None:
+        # Buffered rows may come from the revoked partitions; write and commit them before another member takes over.
+        logger.info("%s revoked %s", name, [(p.topic, p.partition) for p in partitions])
+        _flush()
+        for p in partitions:
+            try:
+                consumer_lag.remove(p.topic, str(p.partition))
+            except KeyError:
+                pass
+
+    consumer.subscribe(topics, on_assign=_on_assign, on_revoke=_on_revoke)
 
     running = True
 
@@ -113,50 +229,53 @@ def main() -> None:
     signal.signal(signal.SIGINT, _stop)
     signal.signal(signal.SIGTERM, _stop)
 
-    logger.info(
-        "mongo-writer started (topics=%s,%s)",
-        settings.kafka_topic,
-        settings.kafka_audit_topic,
-    )
+    logger.info("%s started (topics=%s)", name, ",".join(topics))
 
     try:
         while running:
-            msg = consumer.poll(settings.poll_timeout_seconds)
-            if msg is None:
-                continue
-            if msg.error():
-                raise KafkaException(msg.error())
-
-            raw_value = msg.value().decode("utf-8")
-            topic = msg.topic()
-
-            if topic == settings.kafka_topic:
-                payload = _parse_stats_message(raw_value)
-                if payload is None:
-                    continue
-                now = datetime.now(timezone.utc).isoformat()
-                key = {"sku": payload["sku"], "window_start": payload["window_start"]}
-                update = {
-                    "$set": {
-                        "window_end": payload["window_end"],
-                        "total_qty": payload["total_qty"],
-                        "updated_at": now,
-                    },
-                    "$setOnInsert": {"created_at": now},
-                }
-                stats_collection.bulk_write([UpdateOne(key, update, upsert=True)])
-            elif topic == settings.kafka_audit_topic:
-                payload = _parse_audit_message(raw_value)
-                if payload is None:
-                    continue
-                audit_collection.insert_one(payload)
-            else:
-                logger.warning("unexpected topic %s, skipping", topic)
+            messages = consumer.consume(settings.batch_size, settings.poll_timeout_seconds)
+
+            audit_payloads: list[dict] = []
+            for msg in messages:
+                if msg.error():
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        continue
+                    raise KafkaException(msg.error())
+
+                raw_value = msg.value().decode("utf-8")
+                topic = msg.topic()
+                messages_consumed_total.labels(topic=topic).inc()
+
+                if topic == settings.kafka_topic:
+                    payload = _parse_stats_message(raw_value)
+                    if payload is not None:
+                        stats_buffer.add(payload)
+                elif topic == settings.kafka_audit_topic:
+                    payload = _parse_audit_message(raw_value)
+                    if payload is not None:
+                        audit_payloads.append(payload)
+                else:
+                    logger.warning("unexpected topic %s, skipping", topic)
+
+            _write_audit(audit_collection, audit_payloads)
+            # Offsets cover the whole consumed batch, so they can only be committed while no stats rows are buffered.
+            if stats_buffer.due() or (messages and not stats_buffer):
+                _flush()
+
+        _flush()
     except Exception:
-        logger.exception("mongo-writer crashed")
+        crashed = True
+        logger.exception("%s crashed", name)
         sys.exit(1)
     finally:
         consumer.close()
+        mongo.close()
+        logger.info("%s stopped", name)
+
+
+def main() -> None:
+    _setup_logging()
+    run_consumer([settings.kafka_topic, settings.kafka_audit_topic], metrics_port=settings.metrics_port)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+messages_consumed_total = Counter(
+    "mongo_writer_messages_consumed_total",
+    "Kafka messages consumed, by topic",
+    ["topic"],
+)
+parse_failures_total = Counter(
+    "mongo_writer_parse_failures_total",
+    "Messages skipped because they could not be parsed, by topic and reason",
+    ["topic", "reason"],
+)
+consumer_lag = Gauge(
+    "mongo_writer_consumer_lag",
+    "High watermark minus committed offset, per assigned partition",
+    ["topic", "partition"],
+)
+mongo_write_seconds = Histogram(
+    "mongo_writer_mongo_write_seconds",
+    "Latency of bulk writes to MongoDB, by collection",
+    ["collection"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
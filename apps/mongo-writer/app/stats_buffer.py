@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import time
+
+
+class StatsBuffer:
+    """
+    Write-behind buffer for sku_stats rows. Replays and at-least-once retries from the stream job
+    emit several results for the same (resolution, sku, window_start); only the latest one is kept until flush.
+    """
+
+    def __init__(self, max_keys: int, flush_interval_seconds: float) -> None:
+        self._max_keys = max_keys
+        self._flush_interval_seconds = flush_interval_seconds
+        self._rows: dict[tuple[str, str, str], dict] = {}
+        self._oldest_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, payload: dict) -> None:
+        if not self._rows:
+            self._oldest_at = time.monotonic()
+        self._rows[(payload["resolution"], payload["sku"], payload["window_start"])] = payload
+
+    def due(self) -> bool:
+        if not self._rows:
+            return False
+        return len(self._rows) >= self._max_keys or time.monotonic() - (self._oldest_at or 0.0) >= self._flush_interval_seconds
+
+    def drain(self) -> list[dict]:
+        rows = list(self._rows.values())
+        self._rows.clear()
+        self._oldest_at = None
+        return rows
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import signal
+import sys
+import time
+from multiprocessing.process import BaseProcess
+
+from app.config import settings
+from app.consumer import _setup_logging, run_consumer
+
+logger = logging.getLogger("mongo-writer.supervisor")
+
+
+def _worker_main(topic: str, name: str, metrics_port: int) -> None:
+    _setup_logging()
+    run_consumer([topic], name, metrics_port)
+
+
+def _worker_specs() -> dict[str, str]:
+    specs = {f"stats-{i}": settings.kafka_topic for i in range(settings.stats_workers)}
+    specs.update({f"audit-{i}": settings.kafka_audit_topic for i in range(settings.audit_workers)})
+    return specs
+
+
+def main() -> None:
+    """
+    Runs separate consumer processes per topic so a busy topic cannot starve the other.
+    Workers share the consumer group, so Kafka spreads each topic's partitions across them.
+    Crashed workers are restarted with exponential backoff and given up after too many crashes in a row;
+    the supervisor exits non-zero once no worker is left. On SIGTERM every worker finishes and commits its
+    batch before exiting.
+    """
+    _setup_logging()
+    # spawn: MongoClient and librdkafka handles are not fork-safe.
+    ctx = multiprocessing.get_context("spawn")
+    specs = _worker_specs()
+    metrics_ports = {name: settings.metrics_port + i + 1 if settings.metrics_port else 0 for i, name in enumerate(specs)}
+
+    def _spawn(name: str) -> BaseProcess:
+        process = ctx.Process(target=_worker_main, args=(specs[name], name, metrics_ports[name]), name=name)
+        process.start()
+        return process
+
+    workers = {name: _spawn(name) for name in specs}
+    logger.info("supervisor started %d worker(s): %s", len(workers), ", ".join(workers))
+
+    stopping = False
+
+    def _stop(*_args) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    started_at = {name: time.monotonic() for name in specs}
+    crashes = {name: 0 for name in specs}  # in a row
+    restart_at: dict[str, float] = {}
+    abandoned: set[str] = set()
+
+    while not stopping and len(abandoned) < len(workers):
+        now = time.monotonic()
+        for name, process in workers.items():
+            if name in abandoned:
+                continue
+            if name in restart_at:
+                if now >= restart_at[name]:
+                    del restart_at[name]
+                    workers[name] = _spawn(name)
+                    started_at[name] = now
+                continue
+            if process.is_alive():
+                continue
+
+            if now - started_at[name] >= settings.worker_restart_backoff_max_seconds:
+                crashes[name] = 0
+            if settings.worker_max_restarts and crashes[name] >= settings.worker_max_restarts:
+                logger.error("worker %s exited with code %s after %d restarts in a row, giving up", name, process.exitcode, crashes[name])
+                abandoned.add(name)
+                continue
+            delay = min(settings.worker_restart_backoff_seconds * 2 ** crashes[name], settings.worker_restart_backoff_max_seconds)
+            crashes[name] += 1
+            restart_at[name] = now + delay
+            logger.warning("worker %s exited with code %s, restarting in %.1fs", name, process.exitcode, delay)
+        time.sleep(1.0)
+
+    logger.info("supervisor stopping workers")
+    for process in workers.values():
+        if process.is_alive():
+            process.terminate()
+
+    deadline = time.monotonic() + settings.worker_shutdown_timeout_seconds
+    for name, process in workers.items():
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            logger.warning("worker %s did not stop in time, killing", name)
+            process.kill()
+            process.join()
+
+    if not stopping:
+        logger.error("every worker was given up, exiting")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
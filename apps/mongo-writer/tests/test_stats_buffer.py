@@ -0,0 +1,61 @@
+import pytest
+
+from app import stats_buffer
+from app.stats_buffer import StatsBuffer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(stats_buffer.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _row(sku: str, window_start: str = "2026-10-19T12:00:00+00:00", total_qty: int = 1, resolution: str = "minute") -> dict:
+    return {"resolution": resolution, "sku": sku, "window_start": window_start, "total_qty": total_qty}
+
+
+def test_keeps_only_the_latest_result_per_window(clock):
+    buffer = StatsBuffer(max_keys=10, flush_interval_seconds=2.0)
+    buffer.add(_row("SKU-A", total_qty=1))
+    buffer.add(_row("SKU-A", total_qty=3))
+    buffer.add(_row("SKU-A", total_qty=5, resolution="hour"))
+
+    assert len(buffer) == 2
+    assert buffer.drain() == [_row("SKU-A", total_qty=3), _row("SKU-A", total_qty=5, resolution="hour")]
+
+
+def test_is_due_once_full(clock):
+    buffer = StatsBuffer(max_keys=2, flush_interval_seconds=60.0)
+    buffer.add(_row("SKU-A"))
+    assert not buffer.due()
+
+    buffer.add(_row("SKU-B"))
+    assert buffer.due()
+
+
+def test_is_due_once_the_oldest_row_has_waited_the_interval(clock):
+    buffer = StatsBuffer(max_keys=10, flush_interval_seconds=2.0)
+    assert not buffer.due()
+
+    buffer.add(_row("SKU-A"))
+    clock[0] += 1.5
+    buffer.add(_row("SKU-B"))
+    assert not buffer.due()
+
+    clock[0] += 0.5
+    assert buffer.due()
+
+
+def test_drain_empties_the_buffer_and_restarts_the_interval(clock):
+    # What the consumer does on flush and on partition revoke: nothing buffered may outlive the drain.
+    buffer = StatsBuffer(max_keys=10, flush_interval_seconds=2.0)
+    buffer.add(_row("SKU-A"))
+    clock[0] += 5
+
+    assert len(buffer.drain()) == 1
+    assert not buffer
+    assert buffer.drain() == []
+
+    buffer.add(_row("SKU-B"))
+    assert not buffer.due()
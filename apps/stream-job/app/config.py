@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass, fields
+
+
+@dataclass(frozen=True)
+class JobConfig:
+    kafka_bootstrap_servers: str = "kafka:9092"
+    kafka_source_topic: str = "orders.events"
+    kafka_sink_topic: str = "orders.sku-stats"
+    kafka_group_id: str = "stream-job-v1"
+    parallelism: int = 1
+    window_seconds: int = 60
+    out_of_orderness_seconds: int = 5
+    event_parser: str = "sql"  # sql (JSON decoding and UNNEST in Flink SQL) | python (per-record UDF)
+    rollups_enabled: bool = True  # also emit hour and day resolutions
+    sink_delivery_guarantee: str = "at-least-once"  # at-least-once | exactly-once (transactional, committed on checkpoint)
+    sink_transactional_id_prefix: str = "stream-job-sku-stats"
+    sink_topic_partitions: int = 6
+    sink_topic_replication_factor: int = 1
+    checkpoint_interval_ms: int = 60000  # 0 disables checkpointing
+    checkpoint_dir: str = "file:///opt/flink/checkpoints"
+    state_backend: str = "hashmap"  # hashmap | rocksdb
+    rocksdb_incremental: bool = True
+    runner: str = "flink"  # flink | local (in-process aggregator, no JobManager/TaskManager)
+    local_batch_size: int = 500
+    local_snapshot_path: str = "/tmp/stream-job/state.json"
+    local_snapshot_interval_seconds: int = 10
+    local_idle_timeout_seconds: int = 60  # partitions silent this long stop holding the watermark back; 0 disables
+
+
+def _parse_bool(value: str | bool) -> bool:
+    if isinstance(value, bool):
+        return value
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def load_config(argv: list[str] | None = None) -> JobConfig:
+    """
+    Every field can be set as --kafka-group-id style argument or KAFKA_GROUP_ID style env var;
+    arguments win over env vars, env vars over the defaults above.
+    """
+    parser = argparse.ArgumentParser(description="orders.events -> per-SKU window stats")
+    for field in fields(JobConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            dest=field.name,
+            type=_parse_bool if isinstance(field.default, bool) else type(field.default),
+            default=os.environ.get(field.name.upper(), field.default),
+        )
+    args, _ = parser.parse_known_args(argv)
+    return JobConfig(**vars(args))
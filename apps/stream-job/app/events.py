@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+# Shared by the Flink job and the in-process runner; keep this module free of pyflink imports.
+
+
+def _extract_sku_events(raw: str):
+    try:
+        event = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        return []
+
+    if event.get("event_type") != "OrderCreated":
+        return []
+
+    occurred_at = event.get("created_at")
+    payload = event.get("payload") or {}
+    items = payload.get("items", []) if isinstance(payload, dict) else []
+    if not isinstance(items, list):
+        return []
+    currency = payload.get("currency") if isinstance(payload.get("currency"), str) else ""
+
+    try:
+        dt = datetime.fromisoformat((occurred_at or "").replace("Z", "+00:00"))
+    except Exception:
+        dt = datetime.now(timezone.utc)
+
+    event_ts_ms = int(dt.timestamp() * 1000)
+
+    out = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        sku = item.get("sku")
+        qty = item.get("qty")
+        if not sku or not isinstance(qty, int):
+            continue
+        unit_price = item.get("unit_price")
+        revenue = qty * unit_price if currency and isinstance(unit_price, int) else 0
+        # (sku, currency, qty, revenue, event_ts_ms)
+        out.append((sku, currency, qty, revenue, event_ts_ms))
+    return out
+
+
+def _iso(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).isoformat()
+
+
+def _stats_key(result, resolution: str) -> str:
+    # One key per (sku, resolution, window): a compacted topic keeps only the latest result of each window.
+    return f"{result[0]}|{resolution}|{_iso(result[1])}"
+
+
+def _to_stats_json(result, resolution: str) -> str:
+    sku, window_start_ms, window_end_ms, total_qty, revenue = result
+    return json.dumps(
+        {
+            "sku": sku,
+            "resolution": resolution,
+            "window_start": _iso(window_start_ms),
+            "window_end": _iso(window_end_ms),
+            "total_qty": total_qty,
+            "revenue": dict(revenue),
+        },
+        ensure_ascii=True,
+    )
@@ -1,128 +1,296 @@
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
 
-from pyflink.common import Types
+from pyflink.common import Row, Types
+from pyflink.common.restart_strategy import RestartStrategies
 from pyflink.common.serialization import SimpleStringSchema
 from pyflink.common.time import Time, Duration
 from pyflink.common.watermark_strategy import WatermarkStrategy, TimestampAssigner
-from pyflink.datastream import StreamExecutionEnvironment
-from pyflink.datastream.connectors.kafka import (
-    DeliveryGuarantee,
-    KafkaOffsetsInitializer,
-    KafkaRecordSerializationSchema,
-    KafkaSink,
-    KafkaSource,
-)
-from pyflink.datastream.functions import ProcessWindowFunction
+from pyflink.datastream import EmbeddedRocksDBStateBackend, ExternalizedCheckpointCleanup, HashMapStateBackend, StreamExecutionEnvironment
+from pyflink.datastream.checkpoint_storage import FileSystemCheckpointStorage
+from pyflink.datastream.connectors.kafka import KafkaOffsetResetStrategy, KafkaOffsetsInitializer, KafkaSource
+from pyflink.datastream.functions import AggregateFunction, ProcessWindowFunction
 from pyflink.datastream.window import TumblingEventTimeWindows
+from pyflink.table import StreamTableEnvironment
 
+from app.config import JobConfig, load_config
+from app.events import _extract_sku_events, _stats_key, _to_stats_json
 
-def _extract_sku_events(raw: str):
-    try:
-        event = json.loads(raw) if raw else {}
-    except json.JSONDecodeError:
-        return []
 
-    if event.get("event_type") != "OrderCreated":
-        return []
+SKU_EVENT_TYPE = Types.TUPLE([Types.STRING(), Types.STRING(), Types.INT(), Types.LONG(), Types.LONG()])
+# (total_qty, {currency: revenue})
+ACCUMULATOR_TYPE = Types.TUPLE([Types.LONG(), Types.MAP(Types.STRING(), Types.LONG())])
+# (sku, window_start_ms, window_end_ms, total_qty, {currency: revenue})
+WINDOW_RESULT_TYPE = Types.TUPLE([Types.STRING(), Types.LONG(), Types.LONG(), Types.LONG(), Types.MAP(Types.STRING(), Types.LONG())])
+STATS_RECORD_TYPE = Types.ROW_NAMED(["record_key", "record_value"], [Types.STRING(), Types.STRING()])
 
-    occurred_at = event.get("created_at")
-    payload = event.get("payload") or {}
-    items = payload.get("items", []) if isinstance(payload, dict) else []
-    if not isinstance(items, list):
-        return []
+# The broker rejects producer transactions longer than transaction.max.timeout.ms (15 minutes by default).
+TRANSACTION_TIMEOUT_MS = 900_000
 
-    try:
-        dt = datetime.fromisoformat((occurred_at or "").replace("Z", "+00:00"))
-    except Exception:
-        dt = datetime.now(timezone.utc)
 
-    event_ts_ms = int(dt.timestamp() * 1000)
+class EventTimestampAssigner(TimestampAssigner):
+    def extract_timestamp(self, value, record_timestamp) -> int:
+        # value: (sku, currency, qty, revenue, event_ts_ms)
+        return value[4]
 
-    out = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        sku = item.get("sku")
-        qty = item.get("qty")
-        if not sku or not isinstance(qty, int):
-            continue
-        # (sku, qty, event_ts_ms)
-        out.append((sku, qty, event_ts_ms))
-    return out
 
+def _add_revenue(revenue: dict, currency: str, amount: int) -> dict:
+    if currency:
+        revenue[currency] = revenue.get(currency, 0) + amount
+    return revenue
 
-class EventTimestampAssigner(TimestampAssigner):
-    def extract_timestamp(self, value, record_timestamp) -> int:
-        # value: (sku, qty, event_ts_ms)
-        return value[2]
+
+def _merge_accumulators(a, b):
+    revenue = dict(a[1])
+    for currency, amount in b[1].items():
+        _add_revenue(revenue, currency, amount)
+    return a[0] + b[0], revenue
+
+
+class SumQtyRevenue(AggregateFunction):
+    # Incremental: window state per key is one (qty, revenue) pair instead of every buffered element.
+    def create_accumulator(self):
+        return 0, {}
+
+    def add(self, value, accumulator):
+        _, currency, qty, revenue, _ = value
+        return accumulator[0] + qty, _add_revenue(dict(accumulator[1]), currency, revenue)
+
+    def get_result(self, accumulator):
+        return accumulator
+
+    def merge(self, a, b):
+        return _merge_accumulators(a, b)
+
+
+class MergeRollup(AggregateFunction):
+    # Cascades finer window results (WINDOW_RESULT_TYPE) into a coarser resolution.
+    def create_accumulator(self):
+        return 0, {}
+
+    def add(self, value, accumulator):
+        return _merge_accumulators(accumulator, (value[3], value[4]))
+
+    def get_result(self, accumulator):
+        return accumulator
+
+    def merge(self, a, b):
+        return _merge_accumulators(a, b)
 
 
 class SumPerWindow(ProcessWindowFunction):
     def process(self, key, context, elements):
-        total = 0
-        for e in elements:
-            total += e[1]  # qty
-        window_start = datetime.fromtimestamp(context.window().start / 1000, tz=timezone.utc).isoformat()
-        window_end = datetime.fromtimestamp(context.window().end / 1000, tz=timezone.utc).isoformat()
-        return [
-            json.dumps(
-                {
-                    "sku": key,
-                    "window_start": window_start,
-                    "window_end": window_end,
-                    "total_qty": total,
-                },
-                ensure_ascii=True,
-            )
-        ]
-
-
-def main() -> None:
-    env = StreamExecutionEnvironment.get_execution_environment()
-    env.set_parallelism(1)
+        # elements holds exactly one value: the pre-aggregated (total_qty, revenue) for this key and window.
+        total_qty, revenue = next(iter(elements))
+        return [(key, context.window().start, context.window().end, total_qty, dict(revenue))]
+
+
+def _rollup(results, size: Time):
+    return (
+        results.key_by(lambda r: r[0], key_type=Types.STRING())
+        .window(TumblingEventTimeWindows.of(size))
+        .aggregate(MergeRollup(), window_function=SumPerWindow(), accumulator_type=ACCUMULATOR_TYPE, output_type=WINDOW_RESULT_TYPE)
+    )
+
+
+def _configure_fault_tolerance(env: StreamExecutionEnvironment, config: JobConfig) -> None:
+    if config.state_backend == "rocksdb":
+        # Window state off the JVM heap; incremental checkpoints upload only changed SST files.
+        env.set_state_backend(EmbeddedRocksDBStateBackend(enable_incremental_checkpointing=config.rocksdb_incremental))
+    else:
+        env.set_state_backend(HashMapStateBackend())
 
+    if config.checkpoint_interval_ms <= 0:
+        return
+
+    env.enable_checkpointing(config.checkpoint_interval_ms)
+    env.set_restart_strategy(RestartStrategies.fixed_delay_restart(10, 10_000))
+    checkpoint_config = env.get_checkpoint_config()
+    checkpoint_config.set_checkpoint_storage(FileSystemCheckpointStorage(config.checkpoint_dir))
+    checkpoint_config.set_min_pause_between_checkpoints(config.checkpoint_interval_ms // 2)
+    # Kept on cancel so a redeploy can resume with `flink run -s <checkpoint>`.
+    checkpoint_config.set_externalized_checkpoint_cleanup(ExternalizedCheckpointCleanup.RETAIN_ON_CANCELLATION)
+
+
+def _interval(seconds: int) -> str:
+    return f"INTERVAL '{seconds}' SECOND({max(2, len(str(seconds)))})"
+
+
+def _minute_results_python(env: StreamExecutionEnvironment, config: JobConfig):
     source = (
         KafkaSource.builder()
-        .set_bootstrap_servers("kafka:9092")
-        .set_topics("orders.events")
-        .set_group_id("stream-job-v1")
-        .set_starting_offsets(KafkaOffsetsInitializer.earliest())
+        .set_bootstrap_servers(config.kafka_bootstrap_servers)
+        .set_topics(config.kafka_source_topic)
+        .set_group_id(config.kafka_group_id)
+        # Without a checkpoint to restore, resume from the group's committed offsets rather than replaying the topic.
+        .set_starting_offsets(KafkaOffsetsInitializer.committed_offsets(KafkaOffsetResetStrategy.EARLIEST))
+        .set_property("commit.offsets.on.checkpoint", "true")
         .set_value_only_deserializer(SimpleStringSchema())
         .build()
     )
 
-    sink = (
-        KafkaSink.builder()
-        .set_bootstrap_servers("kafka:9092")
-        .set_record_serializer(
-            KafkaRecordSerializationSchema.builder().set_topic("orders.sku-stats").set_value_serialization_schema(SimpleStringSchema()).build()
-        )
-        .set_delivery_guarantee(DeliveryGuarantee.AT_LEAST_ONCE)
-        .build()
-    )
-
     stream = env.from_source(source, WatermarkStrategy.no_watermarks(), "orders-events")
 
-    sku_events = stream.flat_map(
-        _extract_sku_events,
-        output_type=Types.TUPLE([Types.STRING(), Types.INT(), Types.LONG()]),
-    )
+    sku_events = stream.flat_map(_extract_sku_events, output_type=SKU_EVENT_TYPE)
 
-    with_watermarks = sku_events.assign_timestamps_and_watermarks(
-        WatermarkStrategy.for_bounded_out_of_orderness(Duration.of_seconds(5)).with_timestamp_assigner(EventTimestampAssigner())
-    )
+    watermarks = WatermarkStrategy.for_bounded_out_of_orderness(Duration.of_seconds(config.out_of_orderness_seconds))
+    with_watermarks = sku_events.assign_timestamps_and_watermarks(watermarks.with_timestamp_assigner(EventTimestampAssigner()))
 
-    aggregated = (
+    return (
         with_watermarks.key_by(lambda e: e[0], key_type=Types.STRING())
-        .window(TumblingEventTimeWindows.of(Time.minutes(1)))
-        .process(SumPerWindow(), output_type=Types.STRING())
+        .window(TumblingEventTimeWindows.of(Time.seconds(config.window_seconds)))
+        .aggregate(SumQtyRevenue(), window_function=SumPerWindow(), accumulator_type=ACCUMULATOR_TYPE, output_type=WINDOW_RESULT_TYPE)
+    )
+
+
+def _minute_results_sql(t_env: StreamTableEnvironment, config: JobConfig):
+    """
+    JSON decoding, the OrderCreated filter, the items UNNEST and the window sums all run in the JVM:
+    per (sku, currency) first, then a cascaded window of the same size merges the currencies into one
+    row per sku and window, so Python only converts finished results.
+    """
+    t_env.execute_sql(
+        f"""
+        CREATE TEMPORARY TABLE order_events (
+            event_type STRING,
+            created_at STRING,
+            payload ROW<currency STRING, items ARRAY<ROW<sku STRING, qty INT, unit_price BIGINT>>>,
+            -- accepts both '2026-02-11T18:30:00Z' and Postgres '2026-02-11 18:30:00.123+00';
+            -- events without a timestamp get epoch and are dropped as late instead of failing the job.
+            event_time AS COALESCE(
+                TO_TIMESTAMP(REPLACE(SUBSTRING(created_at FROM 1 FOR 19), 'T', ' ')),
+                TO_TIMESTAMP('1970-01-01 00:00:00')
+            ),
+            WATERMARK FOR event_time AS event_time - {_interval(config.out_of_orderness_seconds)}
+        ) WITH (
+            'connector' = 'kafka',
+            'topic' = '{config.kafka_source_topic}',
+            'properties.bootstrap.servers' = '{config.kafka_bootstrap_servers}',
+            'properties.group.id' = '{config.kafka_group_id}',
+            'properties.commit.offsets.on.checkpoint' = 'true',
+            'properties.auto.offset.reset' = 'earliest',
+            'scan.startup.mode' = 'group-offsets',
+            'format' = 'json',
+            'json.ignore-parse-errors' = 'true',
+            'json.fail-on-missing-field' = 'false'
+        )
+        """
+    )
+    t_env.execute_sql(
+        """
+        CREATE TEMPORARY VIEW order_items AS
+        SELECT
+            i.sku,
+            i.qty,
+            COALESCE(e.payload.currency, '') AS currency,
+            CAST(i.qty AS BIGINT) * COALESCE(i.unit_price, 0) AS revenue,
+            e.event_time
+        FROM order_events AS e
+        CROSS JOIN UNNEST(e.payload.items) AS i (sku, qty, unit_price)
+        WHERE e.event_type = 'OrderCreated' AND i.sku IS NOT NULL AND i.sku <> '' AND i.qty IS NOT NULL
+        """
+    )
+    t_env.execute_sql(
+        f"""
+        CREATE TEMPORARY VIEW currency_totals AS
+        SELECT
+            sku,
+            currency,
+            window_time AS rowtime,
+            CAST(SUM(qty) AS BIGINT) AS total_qty,
+            SUM(revenue) AS revenue
+        FROM TABLE(TUMBLE(TABLE order_items, DESCRIPTOR(event_time), {_interval(config.window_seconds)}))
+        GROUP BY sku, currency, window_start, window_end, window_time
+        """
+    )
+    totals = t_env.sql_query(
+        f"""
+        SELECT
+            sku,
+            window_start,
+            window_end,
+            window_time,
+            SUM(total_qty) AS total_qty,
+            -- 'EUR:1200,USD:300'; SQL has no map aggregate, _row_to_window_result turns it back into a dict.
+            LISTAGG(CASE WHEN currency <> '' THEN currency || ':' || CAST(revenue AS STRING) END, ',') AS revenue
+        FROM TABLE(TUMBLE(TABLE currency_totals, DESCRIPTOR(rowtime), {_interval(config.window_seconds)}))
+        GROUP BY sku, window_start, window_end, window_time
+        """
     )
 
+    # window_time is the rowtime of each result, so the records keep their event time and watermarks here.
+    return t_env.to_data_stream(totals).map(_row_to_window_result, output_type=WINDOW_RESULT_TYPE)
+
+
+def _to_epoch_ms(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _row_to_window_result(row):
+    revenue = {currency: int(amount) for currency, amount in (part.split(":", 1) for part in (row["revenue"] or "").split(",") if part)}
+    return row["sku"], _to_epoch_ms(row["window_start"]), _to_epoch_ms(row["window_end"]), row["total_qty"], revenue
+
+
+def _to_stats_record(result, resolution: str) -> Row:
+    return Row(_stats_key(result, resolution), _to_stats_json(result, resolution))
+
+
+def _create_stats_sink(t_env: StreamTableEnvironment, config: JobConfig) -> None:
+    """
+    Keyed Kafka sink. The DataStream KafkaSink in PyFlink can only serialize the whole element as the key,
+    so the key/value split goes through the SQL connector (raw key and value formats) instead.
+    """
+    options = {
+        "connector": "kafka",
+        "topic": config.kafka_sink_topic,
+        "properties.bootstrap.servers": config.kafka_bootstrap_servers,
+        "key.format": "raw",
+        "key.fields": "record_key",
+        "value.format": "raw",
+        "value.fields-include": "EXCEPT_KEY",
+        "sink.delivery-guarantee": config.sink_delivery_guarantee,
+    }
+    if config.sink_delivery_guarantee == "exactly-once":
+        # Results become visible to read_committed consumers when the checkpoint that covers them completes.
+        options["sink.transactional-id-prefix"] = config.sink_transactional_id_prefix
+        options["properties.transaction.timeout.ms"] = str(TRANSACTION_TIMEOUT_MS)
+    with_clause = ",\n".join(f"'{k}' = '{v}'" for k, v in options.items())
+    t_env.execute_sql(f"CREATE TEMPORARY TABLE sku_stats_sink (record_key STRING, record_value STRING) WITH ({with_clause})")
+
+
+def main(config: JobConfig | None = None) -> None:
+    config = config or load_config()
+    if config.sink_delivery_guarantee == "exactly-once" and config.checkpoint_interval_ms <= 0:
+        raise ValueError("exactly-once sink requires checkpointing (CHECKPOINT_INTERVAL_MS > 0)")
+    env = StreamExecutionEnvironment.get_execution_environment()
+    env.set_parallelism(config.parallelism)
+    _configure_fault_tolerance(env, config)
+
+    t_env = StreamTableEnvironment.create(env)
+    # event_time in the SQL source drops the offset of created_at; outbox timestamps are UTC.
+    t_env.get_config().set("table.local-time-zone", "UTC")
+    _create_stats_sink(t_env, config)
+
+    if config.event_parser == "python":
+        per_minute = _minute_results_python(env, config)
+    else:
+        per_minute = _minute_results_sql(t_env, config)
+    aggregated = per_minute.map(lambda r: _to_stats_record(r, "minute"), output_type=STATS_RECORD_TYPE)
+
+    if config.rollups_enabled:
+        # Window results carry their window's max timestamp, so they cascade into hour and day windows in event time.
+        per_hour = _rollup(per_minute, Time.hours(1))
+        per_day = _rollup(per_hour, Time.days(1))
+        aggregated = aggregated.union(
+            per_hour.map(lambda r: _to_stats_record(r, "hour"), output_type=STATS_RECORD_TYPE),
+            per_day.map(lambda r: _to_stats_record(r, "day"), output_type=STATS_RECORD_TYPE),
+        )
+
     aggregated.print()
-    aggregated.sink_to(sink)
+    statements = t_env.create_statement_set()
+    statements.add_insert("sku_stats_sink", t_env.from_data_stream(aggregated))
+    statements.attach_as_datastream()
 
     env.execute("stream-job")
 
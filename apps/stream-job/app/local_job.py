@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import time
+
+from confluent_kafka import Consumer, KafkaError, KafkaException, Producer, TopicPartition
+
+from app.config import JobConfig, load_config
+from app.events import _extract_sku_events, _stats_key, _to_stats_json
+
+logger = logging.getLogger("stream-job.local")
+
+HOUR_MS = 3_600_000
+DAY_MS = 86_400_000
+MIN_WATERMARK = -(2**63)
+FLUSH_TIMEOUT_SECONDS = 30
+
+
+class WindowState:
+    """
+    Event-time tumbling windows with the semantics of the Flink job: a window fires once the watermark
+    passes its last millisecond, events for windows that already fired are dropped, and fired minute
+    results cascade into hour and day windows at their window's max timestamp.
+    """
+
+    def __init__(self, window_ms: int, rollups_enabled: bool) -> None:
+        self._sizes = {"minute": window_ms}
+        if rollups_enabled:
+            self._sizes.update(hour=HOUR_MS, day=DAY_MS)
+        self.watermark = MIN_WATERMARK
+        # (resolution, sku, window_start_ms) -> [total_qty, {currency: revenue}]
+        self._windows: dict[tuple[str, str, int], list] = {}
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def add(self, resolution: str, sku: str, currency: str, qty: int, revenue: int, ts_ms: int) -> bool:
+        size = self._sizes[resolution]
+        start = ts_ms - ts_ms % size
+        if start + size - 1 <= self.watermark:
+            return False
+        acc = self._windows.setdefault((resolution, sku, start), [0, {}])
+        acc[0] += qty
+        if currency:
+            acc[1][currency] = acc[1].get(currency, 0) + revenue
+        return True
+
+    def advance(self, watermark: int) -> list[tuple[str, tuple]]:
+        """Moves the watermark forward and returns (resolution, result) for every window it closes."""
+        if watermark <= self.watermark:
+            return []
+        self.watermark = watermark
+        fired = []
+        # Coarser resolutions go last so they see the minute results fired in this same pass.
+        for resolution, size in self._sizes.items():
+            due = sorted(key for key in self._windows if key[0] == resolution and key[2] + size - 1 <= watermark)
+            for key in due:
+                total_qty, revenue = self._windows.pop(key)
+                _, sku, start = key
+                result = (sku, start, start + size, total_qty, revenue)
+                fired.append((resolution, result))
+                if resolution == "minute" and "hour" in self._sizes:
+                    self._cascade("hour", result)
+                elif resolution == "hour" and "day" in self._sizes:
+                    self._cascade("day", result)
+        return fired
+
+    def _cascade(self, resolution: str, result: tuple) -> None:
+        sku, _, end, total_qty, revenue = result
+        size = self._sizes[resolution]
+        start = (end - 1) - (end - 1) % size
+        acc = self._windows.setdefault((resolution, sku, start), [0, {}])
+        acc[0] += total_qty
+        for currency, amount in revenue.items():
+            acc[1][currency] = acc[1].get(currency, 0) + amount
+
+    def snapshot(self) -> dict:
+        return {
+            "watermark": self.watermark,
+            "windows": [[resolution, sku, start, acc[0], acc[1]] for (resolution, sku, start), acc in self._windows.items()],
+        }
+
+    def restore(self, data: dict) -> None:
+        self.watermark = data.get("watermark", MIN_WATERMARK)
+        self._windows = {(resolution, sku, start): [qty, revenue] for resolution, sku, start, qty, revenue in data.get("windows", [])}
+
+
+def _load_snapshot(path: str, state: WindowState) -> tuple[dict[int, int], dict[int, int]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}, {}
+    state.restore(data)
+    positions = {int(p): o for p, o in data.get("positions", {}).items()}
+    max_ts = {int(p): ts for p, ts in data.get("max_ts", {}).items()}
+    logger.info("restored %d open windows from %s", len(state), path)
+    return positions, max_ts
+
+
+def _write_snapshot(path: str, state: WindowState, positions: dict[int, int], max_ts: dict[int, int]) -> None:
+    data = state.snapshot()
+    data["positions"] = positions
+    data["max_ts"] = max_ts
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def run(config: JobConfig | None = None) -> None:
+    """
+    Single-process alternative to the Flink job for small deployments and CI. State is a dict of open
+    windows snapshotted to local_snapshot_path together with the consumed positions; a restart resumes
+    from the snapshot, so results are at-least-once like the Flink sink. Fired windows leave the state
+    before their results are delivered, so a snapshot is only taken once every result produced so far
+    has been acknowledged; any delivery failure stops the job with the previous snapshot in place.
+    """
+    config = config or load_config()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+
+    out_of_orderness_ms = config.out_of_orderness_seconds * 1000
+    state = WindowState(config.window_seconds * 1000, config.rollups_enabled)
+    positions, max_ts = _load_snapshot(config.local_snapshot_path, state)
+
+    consumer = Consumer(
+        {
+            "bootstrap.servers": config.kafka_bootstrap_servers,
+            "group.id": config.kafka_group_id,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "earliest",
+        }
+    )
+    producer = Producer({"bootstrap.servers": config.kafka_bootstrap_servers, "enable.idempotence": True, "linger.ms": 50})
+
+    # Last time a record arrived per partition, for idleness; restored partitions count as active from assignment.
+    last_seen: dict[int, float] = {}
+
+    def on_assign(c, partitions):
+        # The snapshot is ahead of or equal to the committed offsets; anything in between would be double counted.
+        for tp in partitions:
+            if tp.partition in positions:
+                tp.offset = positions[tp.partition]
+            last_seen[tp.partition] = time.monotonic()
+        c.assign(partitions)
+
+    def forget(partitions) -> None:
+        for tp in partitions:
+            positions.pop(tp.partition, None)
+            max_ts.pop(tp.partition, None)
+            last_seen.pop(tp.partition, None)
+
+    def watermark() -> int | None:
+        """
+        Like Flink's bounded out-of-orderness watermark with idleness: the slowest active partition decides.
+        Partitions restored from the snapshot but not assigned to this consumer do not count.
+        """
+        now = time.monotonic()
+        timeout = config.local_idle_timeout_seconds
+        active = [
+            ts for partition, ts in max_ts.items() if partition in last_seen and (timeout <= 0 or now - last_seen[partition] < timeout)
+        ]
+        if not active:
+            return None
+        return min(active) - out_of_orderness_ms - 1
+
+    delivery_errors = 0
+
+    def on_delivery(err, msg) -> None:
+        nonlocal delivery_errors
+        if err is not None:
+            delivery_errors += 1
+            logger.error("failed to deliver stats to %s: %s", msg.topic(), err)
+
+    def produce(key: str, value: str) -> None:
+        while True:
+            try:
+                producer.produce(config.kafka_sink_topic, key=key.encode("utf-8"), value=value.encode("utf-8"), on_delivery=on_delivery)
+                return
+            except BufferError:
+                # Local queue full: serve delivery reports until there is room again.
+                producer.poll(0.5)
+
+    def snapshot() -> None:
+        remaining = producer.flush(FLUSH_TIMEOUT_SECONDS)
+        if remaining or delivery_errors:
+            raise RuntimeError(f"{remaining} stats results undelivered, {delivery_errors} failed; keeping the previous snapshot")
+        _write_snapshot(config.local_snapshot_path, state, positions, max_ts)
+        if positions:
+            try:
+                consumer.commit(offsets=[TopicPartition(config.kafka_source_topic, p, o) for p, o in positions.items()], asynchronous=False)
+            except KafkaException as exc:
+                logger.warning("offset commit failed: %s", exc)
+
+    closing = False
+
+    def on_revoke(c, partitions):
+        # Commit what was consumed from these partitions before their new owner starts from the committed offsets.
+        # close() revokes too; by then a clean stop has snapshotted and an error exit must not.
+        if not closing:
+            snapshot()
+        forget(partitions)
+
+    def on_lost(c, partitions):
+        forget(partitions)
+
+    running = True
+
+    def _stop(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    consumer.subscribe([config.kafka_source_topic], on_assign=on_assign, on_revoke=on_revoke, on_lost=on_lost)
+    logger.info("in-process aggregation: %s -> %s", config.kafka_source_topic, config.kafka_sink_topic)
+    last_snapshot = time.monotonic()
+    try:
+        while running:
+            for msg in consumer.consume(num_messages=config.local_batch_size, timeout=1.0):
+                if msg.error():
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        continue
+                    raise KafkaException(msg.error())
+                partition = msg.partition()
+                positions[partition] = msg.offset() + 1
+                last_seen[partition] = time.monotonic()
+                raw = msg.value()
+                for sku, currency, qty, revenue, ts_ms in _extract_sku_events(raw.decode("utf-8", errors="replace") if raw else ""):
+                    max_ts[partition] = max(max_ts.get(partition, ts_ms), ts_ms)
+                    state.add("minute", sku, currency, qty, revenue, ts_ms)
+
+            current = watermark()
+            if current is not None:
+                for resolution, result in state.advance(current):
+                    produce(_stats_key(result, resolution), _to_stats_json(result, resolution))
+            producer.poll(0)
+
+            if time.monotonic() - last_snapshot >= config.local_snapshot_interval_seconds:
+                snapshot()
+                last_snapshot = time.monotonic()
+        # Only a clean stop snapshots: after an error the state may hold neither the fired windows nor their results.
+        snapshot()
+    finally:
+        closing = True
+        consumer.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import logging
+
+from confluent_kafka import KafkaError, KafkaException
+from confluent_kafka.admin import AdminClient, AlterConfigOpType, ConfigEntry, ConfigResource, NewTopic
+
+from app.config import JobConfig, load_config
+
+logger = logging.getLogger("stream-job.topics")
+
+# Every record is keyed by sku|resolution|window_start, so compaction keeps the latest result per window.
+SKU_STATS_TOPIC_CONFIG = {
+    "cleanup.policy": "compact",
+    # Leaves recent duplicates readable for a while so a lagging mongo-writer still sees every window.
+    "min.compaction.lag.ms": "3600000",
+    "segment.ms": "3600000",
+}
+
+
+def ensure_sku_stats_topic(config: JobConfig) -> None:
+    """Creates the sink topic as a compacted topic, or switches an existing one to compaction."""
+    admin = AdminClient({"bootstrap.servers": config.kafka_bootstrap_servers})
+    topic = NewTopic(
+        config.kafka_sink_topic,
+        num_partitions=config.sink_topic_partitions,
+        replication_factor=config.sink_topic_replication_factor,
+        config=SKU_STATS_TOPIC_CONFIG,
+    )
+    try:
+        admin.create_topics([topic])[config.kafka_sink_topic].result()
+        logger.info("created %s with %d partitions", config.kafka_sink_topic, config.sink_topic_partitions)
+        return
+    except KafkaException as exc:
+        if exc.args[0].code() != KafkaError.TOPIC_ALREADY_EXISTS:
+            raise
+
+    resource = ConfigResource(
+        ConfigResource.Type.TOPIC,
+        config.kafka_sink_topic,
+        incremental_configs=[ConfigEntry(k, v, incremental_operation=AlterConfigOpType.SET) for k, v in SKU_STATS_TOPIC_CONFIG.items()],
+    )
+    admin.incremental_alter_configs([resource])[resource].result()
+    # Partition count is left alone: changing it would move existing keys to other partitions.
+    logger.info("%s already exists, compaction config applied", config.kafka_sink_topic)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+    ensure_sku_stats_topic(load_config())
+
+
+if __name__ == "__main__":
+    main()
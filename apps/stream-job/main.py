@@ -1,5 +1,14 @@
+from app.config import load_config
+
+
 def main():
-    print("Hello from stream-job!")
+    config = load_config()
+    if config.runner == "local":
+        from app.local_job import run
+    else:
+        # Submits through the PyFlink client; in the compose stack the job is started with `flink run` instead.
+        from app.job import main as run
+    run(config)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+import json
+
+from app.events import _extract_sku_events
+
+CREATED_AT = "2026-10-19T12:00:00Z"
+CREATED_AT_MS = 1_792_411_200_000
+
+
+def _event(items, event_type: str = "OrderCreated", currency: str | None = "EUR", created_at: str | None = CREATED_AT) -> str:
+    payload = {"items": items}
+    if currency is not None:
+        payload["currency"] = currency
+    return json.dumps({"event_type": event_type, "payload": payload, "created_at": created_at})
+
+
+def test_one_tuple_per_valid_item():
+    raw = _event([{"sku": "SKU-A", "qty": 2, "unit_price": 150}, {"sku": "SKU-B", "qty": 1, "unit_price": 999}])
+
+    assert _extract_sku_events(raw) == [("SKU-A", "EUR", 2, 300, CREATED_AT_MS), ("SKU-B", "EUR", 1, 999, CREATED_AT_MS)]
+
+
+def test_malformed_items_are_skipped():
+    raw = _event([{"sku": "SKU-A", "qty": "2"}, {"qty": 1}, "SKU-C", {"sku": "SKU-D", "qty": 1, "unit_price": 10}])
+
+    assert _extract_sku_events(raw) == [("SKU-D", "EUR", 1, 10, CREATED_AT_MS)]
+
+
+def test_revenue_needs_a_currency_and_an_integer_price():
+    raw = _event([{"sku": "SKU-A", "qty": 2, "unit_price": 150}], currency=None)
+    assert _extract_sku_events(raw) == [("SKU-A", "", 2, 0, CREATED_AT_MS)]
+
+    raw = _event([{"sku": "SKU-A", "qty": 2, "unit_price": "1.50"}])
+    assert _extract_sku_events(raw) == [("SKU-A", "EUR", 2, 0, CREATED_AT_MS)]
+
+
+def test_other_events_and_garbage_yield_nothing():
+    assert _extract_sku_events(_event([{"sku": "SKU-A", "qty": 1}], event_type="OrderPaid")) == []
+    assert _extract_sku_events("{not json") == []
+    assert _extract_sku_events("") == []
+    assert _extract_sku_events(json.dumps({"event_type": "OrderCreated", "payload": {"items": "SKU-A"}})) == []
@@ -0,0 +1,57 @@
+from app.local_job import HOUR_MS, WindowState
+
+MINUTE_MS = 60_000
+T0 = 1_792_411_200_000  # an hour boundary
+
+
+def test_window_fires_once_the_watermark_passes_its_last_millisecond():
+    state = WindowState(MINUTE_MS, rollups_enabled=False)
+    assert state.add("minute", "SKU-A", "EUR", 2, 200, T0 + 1_000)
+    assert state.add("minute", "SKU-A", "USD", 1, 150, T0 + 59_999)
+
+    assert state.advance(T0 + MINUTE_MS - 2) == []
+    fired = state.advance(T0 + MINUTE_MS - 1)
+
+    assert fired == [("minute", ("SKU-A", T0, T0 + MINUTE_MS, 3, {"EUR": 200, "USD": 150}))]
+    assert len(state) == 0
+
+
+def test_events_for_fired_windows_are_dropped():
+    state = WindowState(MINUTE_MS, rollups_enabled=False)
+    state.advance(T0 + MINUTE_MS - 1)
+
+    assert not state.add("minute", "SKU-A", "EUR", 1, 100, T0 + 30_000)
+    assert state.add("minute", "SKU-A", "EUR", 1, 100, T0 + MINUTE_MS)
+    assert len(state) == 1
+
+
+def test_watermark_never_moves_back():
+    state = WindowState(MINUTE_MS, rollups_enabled=False)
+    state.advance(T0)
+    state.add("minute", "SKU-A", "", 1, 0, T0 + 1)
+
+    assert state.advance(T0 - 1) == []
+    assert state.watermark == T0
+
+
+def test_minute_results_cascade_into_the_hour_in_the_same_pass():
+    state = WindowState(MINUTE_MS, rollups_enabled=True)
+    state.add("minute", "SKU-A", "EUR", 1, 100, T0 + 10_000)
+    state.add("minute", "SKU-A", "EUR", 2, 200, T0 + HOUR_MS - 1_000)
+
+    fired = state.advance(T0 + HOUR_MS - 1)
+
+    assert [resolution for resolution, _ in fired] == ["minute", "minute", "hour"]
+    assert fired[-1] == ("hour", ("SKU-A", T0, T0 + HOUR_MS, 3, {"EUR": 300}))
+
+
+def test_snapshot_round_trips_open_windows():
+    state = WindowState(MINUTE_MS, rollups_enabled=False)
+    state.add("minute", "SKU-A", "EUR", 2, 200, T0 + 1_000)
+    state.advance(T0)
+
+    restored = WindowState(MINUTE_MS, rollups_enabled=False)
+    restored.restore(state.snapshot())
+
+    assert restored.watermark == T0
+    assert restored.advance(T0 + MINUTE_MS) == state.advance(T0 + MINUTE_MS)
@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Stock for the SKUs scripts/check.sh orders; orders for SKUs without an inventory row are rejected with 409.
+QTY="${QTY:-1000}"
+
+docker compose -f infra/docker-compose.yml run --rm api python -m app.jobs.seed_inventory --qty "${QTY}" SKU-001 SKU-002